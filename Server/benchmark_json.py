@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of a large issue feed
+Compares Flask's default (stdlib json) provider with the orjson-backed FastJSONProvider in json_provider.py
+"""
+
+import sys
+import timeit
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import FastJSONProvider, ORJSON_AVAILABLE
+
+ISSUE_COUNT = 5000
+REPEAT = 5
+
+def build_feed(count):
+    """Build a feed shaped like the issue_vouch_counts rows returned by /api/issues"""
+    random.seed(42)
+    now = datetime.now(timezone.utc)
+    categories = ['Potholes', 'Garbage', 'Street Light', 'Drainage', 'Water Supply']
+    feed = []
+    for i in range(count):
+        created_at = now - timedelta(minutes=i * 7)
+        vouchers = [
+            {
+                'user_id': random.randint(1, 50000),
+                'mobile_number': f"9{random.randint(100000000, 999999999)}",
+                'civic_id': f"CIV{random.randint(100000, 999999)}",
+                'full_name': 'Test User',
+                'vouched_at': created_at + timedelta(minutes=v)
+            }
+            for v in range(random.randint(0, 6))
+        ]
+        feed.append({
+            'id': count - i,
+            'user_id': random.randint(1, 50000),
+            'title': f"{random.choice(categories)} near ward {i % 198}",
+            'description': 'Reported via the CivicBridge app. ' * 4,
+            'status': 'Open',
+            'category': random.choice(categories),
+            'priority': 'medium',
+            'latitude': Decimal(f"{12.9 + random.random() / 10:.6f}"),
+            'longitude': Decimal(f"{77.5 + random.random() / 10:.6f}"),
+            'vouch_priority': len(vouchers),
+            'vouch_count': len(vouchers),
+            'vouchers': vouchers or None,
+            'image_url': f"https://example.supabase.co/storage/v1/object/public/Civic-Image-Bucket/Images/{i}.jpg",
+            'audio_url': None,
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+    return {'issues': feed, 'source': 'issue_vouch_counts_view', 'count': len(feed)}
+
+def time_provider(name, provider, payload):
+    """Time jsonify-equivalent serialization (provider.response) for the payload"""
+    app = provider._app
+    with app.app_context():
+        size = len(provider.response(payload).get_data())
+        best = min(timeit.repeat(lambda: provider.response(payload), number=1, repeat=REPEAT))
+    print(f"   {name:<28} {best * 1000:8.1f} ms   {size / 1024:8.1f} KB")
+    return best
+
+def main():
+    print(f"🔧 Serializing a {ISSUE_COUNT}-issue feed (best of {REPEAT} runs)")
+    if not ORJSON_AVAILABLE:
+        print("❌ orjson is not installed, FastJSONProvider would fall back to stdlib json")
+        print("   Run: pip install orjson")
+        return 1
+
+    payload = build_feed(ISSUE_COUNT)
+
+    default_app = Flask('default_provider')
+    default_provider = DefaultJSONProvider(default_app)
+    default_provider.compact = True
+
+    fast_app = Flask('fast_provider')
+    fast_provider = FastJSONProvider(fast_app)
+    fast_provider.compact = True
+
+    baseline = time_provider('DefaultJSONProvider (json)', default_provider, payload)
+    fast = time_provider('FastJSONProvider (orjson)', fast_provider, payload)
+    print(f"\n✅ FastJSONProvider is {baseline / fast:.1f}x faster")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+-- Civic ID allocation from a database sequence
+-- Run this in your Supabase SQL Editor
+--
+-- The server reserves civic IDs in blocks (one nextval per block) and hands them out
+-- from memory. Each sequence value n becomes CIV + (1000000 + n * 7368787 mod 9000000),
+-- a 7-digit number: unique for the first 9,000,000 IDs and disjoint from the random
+-- 6-digit IDs issued before this migration.
+
+-- 1. One sequence step reserves a whole block of 100 IDs
+CREATE SEQUENCE IF NOT EXISTS civic_id_block_seq
+    START WITH 0
+    MINVALUE 0
+    INCREMENT BY 100;
+
+-- 2. Reserve the next block: returns {"start": n, "size": 100}
+CREATE OR REPLACE FUNCTION reserve_civic_id_block()
+RETURNS JSON
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+  SELECT json_build_object(
+    'start', nextval('civic_id_block_seq'),
+    'size', (SELECT increment_by FROM pg_sequences WHERE schemaname = 'public' AND sequencename = 'civic_id_block_seq')
+  );
+$$;
+
+GRANT EXECUTE ON FUNCTION reserve_civic_id_block() TO authenticated, anon;
+
+-- 3. Civic IDs must stay unique; existing random duplicates have to be fixed by hand first
+DO $$
+BEGIN
+    IF EXISTS (SELECT civic_id FROM users WHERE civic_id IS NOT NULL GROUP BY civic_id HAVING COUNT(*) > 1) THEN
+        RAISE NOTICE 'Duplicate civic IDs found, unique index not created. Fix them and re-run this file.';
+    ELSE
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_users_civic_id_unique ON users(civic_id);
+    END IF;
+END $$;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Civic ID allocator installed successfully!';
+    RAISE NOTICE '- SELECT reserve_civic_id_block(); reserves the next 100 IDs';
+END $$;
@@ -0,0 +1,55 @@
+-- Delta sync support for GET /api/issues/changes?since=<token>
+-- Run this in your Supabase SQL Editor after database_schema.sql and create_vouch_table.sql
+
+-- 1. Index for reading changes in (updated_at, id) order
+CREATE INDEX IF NOT EXISTS idx_issues_updated_at_id ON issues(updated_at, id);
+
+-- 2. A new or removed vouch counts as a change to the issue, even when it is
+--    written without going through the vouch_issue() function
+CREATE OR REPLACE FUNCTION touch_issue_on_vouch_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE issues
+    SET updated_at = NOW()
+    WHERE id = COALESCE(NEW.issue_id, OLD.issue_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS touch_issue_on_vouch_change ON vouches;
+CREATE TRIGGER touch_issue_on_vouch_change
+    AFTER INSERT OR DELETE ON vouches
+    FOR EACH ROW
+    EXECUTE FUNCTION touch_issue_on_vouch_change();
+
+-- 3. Tombstones so clients can drop issues that were deleted since their last sync
+CREATE TABLE IF NOT EXISTS issue_tombstones (
+    issue_id BIGINT PRIMARY KEY,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_issue_tombstones_deleted_at ON issue_tombstones(deleted_at);
+
+CREATE OR REPLACE FUNCTION record_issue_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO issue_tombstones (issue_id, deleted_at)
+    VALUES (OLD.id, NOW())
+    ON CONFLICT (issue_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS record_issue_tombstone ON issues;
+CREATE TRIGGER record_issue_tombstone
+    AFTER DELETE ON issues
+    FOR EACH ROW
+    EXECUTE FUNCTION record_issue_tombstone();
+
+GRANT SELECT ON issue_tombstones TO authenticated, anon;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Delta sync triggers and issue_tombstones table created successfully!';
+END $$;
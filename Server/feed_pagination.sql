@@ -0,0 +1,12 @@
+-- Keyset pagination support for GET /api/issues?limit=&cursor=
+-- Run this in your Supabase SQL Editor
+
+-- The feed is ordered by (created_at DESC, id DESC); this composite index lets
+-- each page be read with an index range scan instead of sorting the whole table
+CREATE INDEX IF NOT EXISTS idx_issues_created_at_id ON issues(created_at DESC, id DESC);
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Feed pagination index created successfully!';
+END $$;
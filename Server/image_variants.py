@@ -0,0 +1,55 @@
+"""
+Image derivative rendering for issue photos (thumb / card / full)
+Runs inside worker processes started by main.py, so this module must stay free of import-time side effects
+"""
+
+import os
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# name -> longest edge in pixels, largest first so each size is resized from the previous one
+VARIANT_SIZES = (('full', 1600), ('card', 480), ('thumb', 160))
+
+def supported_format(preferred):
+    """'AVIF' when asked for and this Pillow build can write it, otherwise 'WEBP'"""
+    if not PIL_AVAILABLE:
+        return None
+    Image.init()
+    if preferred.upper() == 'AVIF' and 'AVIF' in Image.SAVE:
+        return 'AVIF'
+    return 'WEBP'
+
+def render_variants(source_path, output_dir, image_format='WEBP', quality=80):
+    """
+    Decode source_path once and write every variant to output_dir.
+
+    EXIF orientation is applied before resizing, and images are never upscaled.
+    Returns {name: {'path', 'width', 'height', 'bytes', 'content_type'}}.
+    """
+    extension = image_format.lower()
+    base = os.path.splitext(os.path.basename(source_path))[0]
+    largest = VARIANT_SIZES[0][1]
+
+    with Image.open(source_path) as opened:
+        # Let the JPEG decoder scale down by a power of two while decoding when the photo is huge
+        opened.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {}
+    for name, edge in VARIANT_SIZES:
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        path = os.path.join(output_dir, f"{base}_{name}.{extension}")
+        image.save(path, image_format, quality=quality)
+        variants[name] = {
+            'path': path,
+            'width': image.width,
+            'height': image.height,
+            'bytes': os.path.getsize(path),
+            'content_type': f'image/{extension}'
+        }
+    return variants
@@ -0,0 +1,59 @@
+-- Image derivatives (thumb / card / full)
+-- Run this in your Supabase SQL Editor after media_pipeline.sql,
+-- then set IMAGE_VARIANTS_ENABLED=true on the server (requires Pillow)
+--
+-- image_variants holds the resized WebP/AVIF copies stored next to the original photo:
+-- {"thumb": {"url": "...", "width": 160, "height": 120, "bytes": 5120}, "card": {...}, "full": {...}}
+-- NULL until the derivatives are ready; clients fall back to image_url.
+
+-- 1. Derivative URLs and sizes
+ALTER TABLE issues ADD COLUMN IF NOT EXISTS image_variants JSONB;
+
+-- 2. Expose image_variants through issue_vouch_counts (new column appended at the end)
+CREATE OR REPLACE VIEW issue_vouch_counts AS
+SELECT
+    i.id,
+    i.user_id,
+    i.title,
+    i.description,
+    i.status,
+    i.category,
+    i.priority,
+    i.latitude,
+    i.longitude,
+    i.description_mode,
+    i.image_filename,
+    i.audio_filename,
+    i.image_url,
+    i.audio_url,
+    i.vouch_priority,
+    i.created_at,
+    i.updated_at,
+    i.vouch_count,
+    (
+        SELECT ARRAY_AGG(
+            JSON_BUILD_OBJECT(
+                'user_id', u.id,
+                'mobile_number', u.mobile_number,
+                'civic_id', u.civic_id,
+                'full_name', u.full_name,
+                'vouched_at', v.created_at
+            )
+        )
+        FROM vouches v
+        JOIN users u ON u.id = v.user_id
+        WHERE v.issue_id = i.id
+    ) AS vouchers,
+    i.media_status,
+    i.image_variants
+FROM issues i;
+
+GRANT SELECT ON issue_vouch_counts TO authenticated, anon;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Image variants column installed successfully!';
+    RAISE NOTICE '- issues.image_variants: thumb / card / full derivative URLs';
+    RAISE NOTICE '- issue_vouch_counts now includes image_variants';
+END $$;
@@ -0,0 +1,23 @@
+"""
+Image derivative worker process, started by main.py as `python image_worker.py`
+Reads one JSON job per line on stdin and answers with one JSON line on stdout, so the only
+modules it ever imports are this one and image_variants (never the Flask app)
+"""
+
+import json
+import sys
+
+from image_variants import render_variants
+
+def main():
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            reply = {'variants': render_variants(job['source_path'], job['output_dir'], job['format'], job['quality'])}
+        except Exception as e:
+            reply = {'error': f"{type(e).__name__}: {e}"}
+        sys.stdout.write(json.dumps(reply) + '\n')
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
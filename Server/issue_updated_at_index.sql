@@ -0,0 +1,12 @@
+-- Index backing the issue set version token (ETag / Last-Modified on issue lists)
+-- Run this in your Supabase SQL Editor
+
+-- The server reads max(updated_at) with ORDER BY updated_at DESC LIMIT 1;
+-- this turns that into a single index lookup
+CREATE INDEX IF NOT EXISTS idx_issues_updated_at ON issues(updated_at DESC);
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Issue updated_at index created successfully!';
+END $$;
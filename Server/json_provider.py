@@ -0,0 +1,50 @@
+"""
+orjson-backed JSON provider for the Flask app
+Kept out of main.py so it can be imported (e.g. by benchmark_json.py) without starting the server
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson-backed JSON provider for jsonify() and app.json.
+
+    datetime/date/UUID are encoded natively by orjson (ISO 8601); Decimal and anything else
+    orjson does not know go through Flask's default hook. Keys are not sorted, which keeps the
+    hot feed endpoints cheaper. Without orjson installed this behaves like DefaultJSONProvider.
+    """
+
+    sort_keys = False
+
+    def _orjson_options(self, kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if not ORJSON_AVAILABLE:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=self._orjson_options(kwargs)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if not ORJSON_AVAILABLE:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not ORJSON_AVAILABLE:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=DefaultJSONProvider.default,
+                            option=self._orjson_options({'indent': indent}) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
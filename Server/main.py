@@ -2,7 +2,7 @@
 Flask API server to receive issue reports and store them in Supabase
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import base64
@@ -10,12 +10,31 @@ import random
 import string
 import jwt
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from werkzeug.utils import secure_filename
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import io
+import httpx
+import zlib
+import bisect
+from array import array
+import math
 import uuid
+import time
+import hashlib
+import hmac
+import heapq
+import sqlite3
+import threading
+import atexit
+import queue
+from collections import OrderedDict, deque
+from functools import wraps
+from abc import ABC, abstractmethod
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, Future
 
 # Firebase imports
 try:
@@ -26,11 +45,33 @@ except ImportError:
     FIREBASE_AVAILABLE = False
     print("⚠️  Firebase Admin SDK not installed. Run: pip install firebase-admin")
 
+# Fast JSON serialization (falls back to Flask's stdlib-based provider)
+from json_provider import FastJSONProvider, ORJSON_AVAILABLE
+if not ORJSON_AVAILABLE:
+    print("⚠️  orjson not installed, using the standard JSON encoder. Run: pip install orjson")
+
+# Optional response compressors (gzip is always available via zlib)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Image derivatives (thumb/card/full) need Pillow; without it only the original is stored
+from image_variants import PIL_AVAILABLE, supported_format
+
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['ETag', 'Last-Modified'])  # Enable CORS for all routes
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
@@ -104,23 +145,689 @@ def log_response(response_data, status_code):
     """Log the response being sent"""
     print(f"\n📤 RESPONSE LOG:")
     print(f"Status Code: {status_code}")
-    print(f"Response Size: {len(str(response_data))} characters")
     
-    # Pretty print response (truncate if too long)
-    import json
+    # Serialize once with the fast provider; only small payloads are pretty printed
     if isinstance(response_data, dict):
-        response_str = json.dumps(response_data, indent=2)
+        response_str = app.json.dumps(response_data)
+        print(f"Response Size: {len(response_str)} characters")
         if len(response_str) > 500:
             print(f"Response Preview (truncated):")
             print(response_str[:300] + "\n... [response truncated for readability] ...")
         else:
             print(f"Response Data:")
-            print(response_str)
+            print(app.json.dumps(response_data, indent=2))
     else:
+        print(f"Response Size: {len(str(response_data))} characters")
         print(f"Response Data: {response_data}")
     
     print(f"{'='*60}\n")
 
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL, with hit/miss counters"""
+
+    def __init__(self, max_entries=256, ttl_seconds=60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value or None (counts as a miss) if absent or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key):
+        """Return the cached value or None without touching the counters or LRU order"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def replace(self, key, value):
+        """Swap the value of a live entry, keeping its expiry; returns False if there is none"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return False
+            self._entries[key] = (entry[0], value)
+            return True
+
+    def set(self, key, value, ttl_seconds=None):
+        """Store a value; ttl_seconds overrides the default TTL for this entry"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry (used for write-triggered invalidation)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+# Issue feed cache: serialized feed responses, cleared whenever an issue write succeeds
+FEED_CACHE_TTL_SECONDS = float(os.getenv('FEED_CACHE_TTL_SECONDS', '30'))
+FEED_CACHE_MAX_ENTRIES = int(os.getenv('FEED_CACHE_MAX_ENTRIES', '512'))
+feed_cache = TTLCache(max_entries=FEED_CACHE_MAX_ENTRIES, ttl_seconds=FEED_CACHE_TTL_SECONDS)
+
+def feed_cache_key(endpoint_name, per_user, generation):
+    """
+    Cache key from the endpoint, its sorted query string, (for per-user feeds) the caller's
+    token and the local write generation the response is built from.
+
+    With the generation in the key, a body stored by a request that raced a write can only
+    be found under the old generation, which no later request looks up.
+    """
+    args = tuple(sorted(request.args.items(multi=True)))
+    caller = None
+    if per_user:
+        auth_header = request.headers.get('Authorization')
+        if auth_header:
+            caller = hashlib.sha256(auth_header.encode('utf-8')).hexdigest()
+    return (endpoint_name, args, caller, generation)
+
+class IssueSetVersion:
+    """
+    Cheap version token for the whole issue set: max(issues.updated_at) plus a local write counter.
+
+    Local writes bump it immediately. Writes made by other worker processes are picked up by
+    re-reading max(updated_at) (one indexed single-row query) at most every refresh_seconds.
+    """
+
+    def __init__(self, refresh_seconds=30):
+        self.refresh_seconds = refresh_seconds
+        self.write_counter = 0
+        self.max_updated_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.write_counter += 1
+            self.max_updated_at = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def current(self):
+        """Return (max_updated_at, write_counter), refreshing from the database when due"""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.refresh_seconds:
+                self._checked_at = now
+                self._refresh_from_database()
+            return self.max_updated_at, self.write_counter
+
+    def _refresh_from_database(self):
+        if not supabase:
+            return
+        try:
+            result = supabase.table('issues').select('updated_at').order('updated_at', desc=True).limit(1).execute()
+            if result.data and result.data[0].get('updated_at'):
+                db_max = datetime.fromisoformat(result.data[0]['updated_at']).replace(microsecond=0)
+                if db_max.tzinfo is None:
+                    db_max = db_max.replace(tzinfo=timezone.utc)
+                if self.max_updated_at is None or db_max > self.max_updated_at:
+                    self.max_updated_at = db_max
+        except Exception as e:
+            print(f"⚠️ Could not refresh issue set version: {e}")
+
+issue_set_version = IssueSetVersion(refresh_seconds=FEED_CACHE_TTL_SECONDS)
+
+def feed_etag(key, generation):
+    """
+    Weak ETag for a feed response: the issue set version combined with the cache key.
+
+    `generation` is the write counter read before the body was built, not the counter at the
+    time the ETag is computed, so the tag always names the data the body came from.
+    """
+    max_updated_at, _ = issue_set_version.current()
+    token = f"{max_updated_at.isoformat() if max_updated_at else '-'}|{generation}|{key!r}"
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()[:20], max_updated_at
+
+def add_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def cached_feed(endpoint_name, per_user=False):
+    """
+    Serve a GET feed endpoint with conditional requests and from feed_cache.
+
+    A request whose If-None-Match matches the current issue set version is answered with
+    304 before any query or serialization. Otherwise only successful responses without an
+    'error' key are cached, as raw JSON bytes so a hit skips both the database query and
+    serialization. per_user feeds (e.g. nearby, which hides the caller's own issues) are
+    keyed by the Authorization header as well. Cache entries keep the validators they were
+    first served with. A body built while a write landed gets neither a cache entry nor an
+    ETag, so it can never be revalidated with 304.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            generation = issue_set_version.write_counter
+            key = feed_cache_key(endpoint_name, per_user, generation)
+            etag, last_modified = feed_etag(key, generation)
+            if request.if_none_match.contains_weak(etag):
+                print(f"⚡ FEED NOT MODIFIED: {request.full_path}")
+                return add_validators(app.response_class(status=304), etag, last_modified)
+
+            cached = feed_cache.get(key)
+            if cached is not None:
+                print(f"⚡ FEED CACHE HIT: {request.full_path}")
+                body, cached_etag, cached_last_modified = cached
+                response = app.response_class(body, status=200, mimetype='application/json')
+                return add_validators(response, cached_etag, cached_last_modified)
+
+            response = app.make_response(view_func(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                data = response.get_json(silent=True)
+                # A write that landed while the view ran may or may not be in this body
+                if isinstance(data, dict) and 'error' not in data and issue_set_version.write_counter == generation:
+                    feed_cache.set(key, (response.get_data(), etag, last_modified))
+                    add_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+def invalidate_issue_feeds(reason):
+    """Call after any successful write to issues or vouches (create, vouch, status change)"""
+    issue_set_version.bump()
+    feed_cache.clear()
+    compressed_body_cache.clear()
+    print(f"♻️ Issue feed cache invalidated ({reason})")
+
+# Response compression negotiated from Accept-Encoding
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+# text/event-stream is left out: an incremental encoder would hold events back until its buffer fills
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/html')
+
+# Server preference order; only encodings whose library is installed are offered
+SUPPORTED_ENCODINGS = [enc for enc, available in (('zstd', ZSTD_AVAILABLE), ('br', BROTLI_AVAILABLE), ('gzip', True)) if available]
+
+# Compressed variants of feed bodies, keyed by (ETag, encoding) so cache hits are not recompressed
+compressed_body_cache = TTLCache(max_entries=FEED_CACHE_MAX_ENTRIES * 2, ttl_seconds=FEED_CACHE_TTL_SECONDS)
+
+def new_compressor(encoding):
+    """Return (compress_chunk, finish) callables for an incremental encoder"""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return compressor.compress, compressor.flush
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    return compressor.compress, compressor.flush
+
+def compress_body(body, encoding):
+    compress, finish = new_compressor(encoding)
+    return compress(body) + finish()
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body chunk by chunk so streaming responses stay streaming"""
+    compress, finish = new_compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON/text responses for clients that accept zstd, br or gzip"""
+    if not COMPRESSION_ENABLED or response.status_code != 200 or response.direct_passthrough:
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        etag, _ = response.get_etag()
+        cache_key = (etag, encoding)
+        compressed = compressed_body_cache.get(cache_key) if etag else None
+        if compressed is None:
+            compressed = compress_body(body, encoding)
+            if etag:
+                compressed_body_cache.set(cache_key, compressed)
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Keyset pagination for issue feeds (ordered by created_at DESC, id DESC)
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+def encode_cursor(sort_value, issue_id):
+    """Encode the sort key (created_at or distance, id) of the last row on a page as an opaque cursor"""
+    raw = json.dumps([sort_value, issue_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor back into (sort_value, id). Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, issue_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return sort_value, int(issue_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def parse_cursor_timestamp(value):
+    """
+    Validate a timestamp decoded from a client token and return it re-rendered as ISO 8601.
+
+    Cursor values end up inside raw PostgREST filter strings, so anything that is not a
+    real timestamp is rejected rather than passed through. Raises ValueError.
+    """
+    if not isinstance(value, str):
+        raise ValueError('Invalid cursor')
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError as e:
+        raise ValueError('Invalid cursor') from e
+
+def parse_page_args():
+    """
+    Read `limit` and `cursor` from the query string.
+
+    Returns None when the client did not ask for pagination (legacy full list),
+    otherwise a dict with 'limit' and the decoded 'after' key (or None for the first page).
+    Raises ValueError on bad input.
+    """
+    limit_arg = request.args.get('limit')
+    cursor_arg = request.args.get('cursor')
+    if limit_arg is None and not cursor_arg:
+        return None
+
+    after = None
+    if cursor_arg:
+        created_at, issue_id = decode_cursor(cursor_arg)
+        after = (parse_cursor_timestamp(created_at), issue_id)
+
+    return {
+        'limit': parse_limit_arg(limit_arg),
+        'after': after
+    }
+
+def parse_limit_arg(limit_arg):
+    """Validate a `limit` query parameter and clamp it to MAX_PAGE_LIMIT"""
+    if limit_arg is None:
+        return DEFAULT_PAGE_LIMIT
+    try:
+        limit = int(limit_arg)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_PAGE_LIMIT)
+
+def apply_keyset_page(query, page):
+    """Add keyset ordering, the cursor predicate and limit (+1 to detect a next page) to a PostgREST query"""
+    # postgrest-py has no or_() / multi-column order helpers, so set the raw params
+    query.params = query.params.add('order', 'created_at.desc,id.desc')
+    if page['after']:
+        created_at, issue_id = page['after']
+        query.params = query.params.add(
+            'or', f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{issue_id}))'
+        )
+    return query.limit(page['limit'] + 1)
+
+def finish_page(rows, page):
+    """Trim the look-ahead row and build the cursor for the next page"""
+    has_more = len(rows) > page['limit']
+    rows = rows[:page['limit']]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(rows[-1].get('created_at'), rows[-1].get('id'))
+    return rows, next_cursor
+
+def paginate_in_memory(items, page):
+    """Apply the same keyset pagination to the in-memory issue list"""
+    ordered = sorted(items, key=lambda i: (str(i.get('created_at') or ''), i.get('id') or 0), reverse=True)
+    if page['after']:
+        after = (page['after'][0], page['after'][1])
+        ordered = [i for i in ordered if (str(i.get('created_at') or ''), i.get('id') or 0) < after]
+    return finish_page(ordered[:page['limit'] + 1], page)
+
+# Field projection (?fields=) for issue feeds
+ISSUE_TABLE_FIELDS = (
+    'id', 'user_id', 'title', 'description', 'latitude', 'longitude', 'category', 'priority',
+    'description_mode', 'image_filename', 'audio_filename', 'image_url', 'audio_url',
+    'status', 'vouch_priority', 'created_at', 'updated_at', 'media_status', 'image_variants'
+)
+# Columns computed by the issue_vouch_counts view; `vouchers` is the heavy ARRAY_AGG
+VOUCH_VIEW_FIELDS = ('vouch_count', 'vouchers')
+MEDIA_DEFAULT_FIELDS = ('image_filename', 'audio_filename', 'image_url', 'audio_url', 'description_mode', 'image_variants')
+
+def parse_fields_arg(*required):
+    """
+    Parse ?fields=a,b,c into a validated column list, or None when no projection was asked for.
+
+    `required` columns (needed server-side for sorting, cursors or filtering) are always included.
+    Raises ValueError for unknown field names.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in ISSUE_TABLE_FIELDS and f not in VOUCH_VIEW_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(list(required) + fields))
+
+def view_select(fields):
+    """select() for issue_vouch_counts; leaving out `vouchers` lets Postgres skip that aggregate"""
+    return ','.join(fields) if fields else '*'
+
+def table_select(fields, default_select):
+    """select() for the issues table fallback; vouch_count is derived from vouch_priority there"""
+    if not fields:
+        return default_select
+    columns = [f for f in fields if f in ISSUE_TABLE_FIELDS]
+    if 'vouch_count' in fields and 'vouch_priority' not in columns:
+        columns.append('vouch_priority')
+    return ','.join(columns)
+
+def with_media_columns(select_fields):
+    """
+    Append the media pipeline / derivative columns to an issues-table select when their
+    migrations are in use (media_pipeline.sql, image_variants.sql), so the fallback shows them too.
+    """
+    extra = [column for column, enabled in (('media_status', MEDIA_PIPELINE_ENABLED),
+                                            ('image_variants', IMAGE_VARIANTS_ENABLED)) if enabled]
+    return ','.join([select_fields] + extra)
+
+def add_frontend_defaults(issue, fields, from_view=True):
+    """Fill vouch_count and the media fields the frontend expects, limited to the requested projection"""
+    if not fields or 'vouch_count' in fields:
+        if from_view:
+            issue['vouch_count'] = issue.get('vouch_count', issue.get('vouch_priority', 0))
+        else:
+            issue['vouch_count'] = issue.get('vouch_priority', 0)
+    if from_view:
+        for field in MEDIA_DEFAULT_FIELDS:
+            if field not in issue and (not fields or field in fields):
+                issue[field] = None
+    if fields and 'vouch_priority' not in fields:
+        issue.pop('vouch_priority', None)
+    return issue
+
+def normalize_user_id(user_id):
+    """
+    Canonical form of a users.id value from a token: int for numeric IDs, str otherwise.
+
+    Done once at auth time so filters can compare against the BIGINT column directly.
+    """
+    if user_id is None or isinstance(user_id, bool):
+        return None
+    if isinstance(user_id, int):
+        return user_id
+    text = str(user_id).strip()
+    if not text:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+def exclude_user_issues(query, user_id):
+    """
+    Server-side "not reported by this user" predicate (user_id IS DISTINCT FROM :id).
+
+    A plain neq would also drop anonymous issues (user_id IS NULL), so NULLs are kept explicitly.
+    """
+    if user_id is None:
+        return query
+    value = user_id if isinstance(user_id, int) else f'"{user_id}"'
+    query.params = query.params.add('or', f'(user_id.is.null,user_id.neq.{value})')
+    return query
+
+# Radius / bounding-box search for /api/issues/nearby
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+DEFAULT_NEARBY_RADIUS_M = 5000
+MAX_NEARBY_RADIUS_M = 50000
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters between two WGS84 points"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def radius_to_bbox(lat, lng, radius_m):
+    """Smallest lat/lng box (min_lng, min_lat, max_lng, max_lat) that contains the circle"""
+    dlat = radius_m / METERS_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    dlng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_m / (METERS_PER_DEGREE_LAT * cos_lat))
+    return (max(-180.0, lng - dlng), max(-90.0, lat - dlat),
+            min(180.0, lng + dlng), min(90.0, lat + dlat))
+
+def parse_geo_args():
+    """
+    Read lat/lng/radius_m/bbox/limit/cursor for a location search.
+
+    Returns None when no location was given (legacy behaviour), otherwise a dict with the
+    search center, optional radius, the bounding box pushed down to the database and the page.
+    `bbox` is "min_lng,min_lat,max_lng,max_lat"; results are sorted by distance from
+    lat/lng, or from the box center when only a bbox is given. Raises ValueError on bad input.
+    """
+    lat_arg, lng_arg = request.args.get('lat'), request.args.get('lng')
+    bbox_arg = request.args.get('bbox')
+    if lat_arg is None and lng_arg is None and not bbox_arg:
+        return None
+
+    bbox = None
+    if bbox_arg:
+        try:
+            bbox = tuple(float(v) for v in bbox_arg.split(','))
+        except ValueError:
+            raise ValueError('bbox must be four numbers: min_lng,min_lat,max_lng,max_lat')
+        if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            raise ValueError('bbox must be four numbers: min_lng,min_lat,max_lng,max_lat')
+
+    radius_m = None
+    if lat_arg is not None or lng_arg is not None:
+        try:
+            lat, lng = float(lat_arg), float(lng_arg)
+        except (TypeError, ValueError):
+            raise ValueError('lat and lng must both be numbers')
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError('lat/lng out of range')
+        try:
+            radius_m = float(request.args.get('radius_m', DEFAULT_NEARBY_RADIUS_M))
+        except ValueError:
+            raise ValueError('radius_m must be a number')
+        if radius_m <= 0:
+            raise ValueError('radius_m must be positive')
+        radius_m = min(radius_m, MAX_NEARBY_RADIUS_M)
+        circle_box = radius_to_bbox(lat, lng, radius_m)
+        if bbox:
+            # Intersect the caller's box with the circle's box
+            bbox = (max(bbox[0], circle_box[0]), max(bbox[1], circle_box[1]),
+                    min(bbox[2], circle_box[2]), min(bbox[3], circle_box[3]))
+        else:
+            bbox = circle_box
+    else:
+        lat, lng = (bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2
+
+    after = None
+    cursor_arg = request.args.get('cursor')
+    if cursor_arg:
+        distance, issue_id = decode_cursor(cursor_arg)
+        try:
+            after = (float(distance), issue_id)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+
+    return {
+        'lat': lat,
+        'lng': lng,
+        'radius_m': radius_m,
+        'bbox': bbox,
+        'limit': parse_limit_arg(request.args.get('limit')),
+        'after': after
+    }
+
+def apply_geo_bounds(query, geo):
+    """Push the bounding box down to PostgREST so idx_issues_location can serve it"""
+    min_lng, min_lat, max_lng, max_lat = geo['bbox']
+    return (query.gte('latitude', min_lat).lte('latitude', max_lat)
+                 .gte('longitude', min_lng).lte('longitude', max_lng))
+
+# Page size for scanning a bounding box; must not exceed PostgREST's max-rows (1000 on Supabase)
+GEO_SCAN_PAGE_SIZE = 1000
+
+def fetch_bbox_rows(build_query, geo):
+    """
+    Read every row inside the bounding box, paging by id.
+
+    A single response would be cut to PostgREST's max-rows in a dense area, leaving an
+    arbitrary subset to sort. build_query() must return a fresh, already filtered query.
+    """
+    rows = []
+    last_id = None
+    while True:
+        query = apply_geo_bounds(build_query(), geo).order('id')
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        batch = query.limit(GEO_SCAN_PAGE_SIZE).execute().data or []
+        rows.extend(batch)
+        if len(batch) < GEO_SCAN_PAGE_SIZE:
+            return rows
+        last_id = batch[-1]['id']
+
+def fetch_nearby_page(geo, user_id, fields):
+    """
+    One distance-ordered page from the nearby_issues() function (nearby_issues.sql).
+
+    Ordering, the (distance, id) cursor and the limit are applied in the database.
+    Returns (page_rows, next_cursor); raises if the function is not installed.
+    """
+    min_lng, min_lat, max_lng, max_lat = geo['bbox']
+    after_distance, after_id = geo['after'] if geo['after'] else (None, None)
+    result = supabase.rpc('nearby_issues', {
+        'center_lat': geo['lat'],
+        'center_lng': geo['lng'],
+        'radius_m': geo['radius_m'],
+        'min_lat': min_lat,
+        'min_lng': min_lng,
+        'max_lat': max_lat,
+        'max_lng': max_lng,
+        'after_distance': after_distance,
+        'after_id': after_id,
+        # users.id is BIGINT, so a non-numeric ID owns no rows to exclude
+        'exclude_user_id': user_id if isinstance(user_id, int) else None,
+        'page_limit': geo['limit'] + 1,
+        # The projection is applied in the function, so `vouchers` is only aggregated when asked for
+        'fields': fields
+    }).execute()
+    rows = result.data or []
+
+    page_rows = rows[:geo['limit']]
+    next_cursor = None
+    if len(rows) > geo['limit'] and page_rows:
+        next_cursor = encode_cursor(page_rows[-1]['distance_m'], page_rows[-1].get('id'))
+    return page_rows, next_cursor
+
+def rank_by_distance(rows, geo):
+    """
+    Exact distance filter + sort for rows inside the bounding box, then cut one page.
+
+    Adds `distance_m` to each returned row. Returns (page_rows, next_cursor).
+    """
+    min_lng, min_lat, max_lng, max_lat = geo['bbox']
+    ranked = []
+    for row in rows:
+        try:
+            row_lat, row_lng = float(row.get('latitude')), float(row.get('longitude'))
+        except (TypeError, ValueError):
+            continue
+        if not (min_lat <= row_lat <= max_lat and min_lng <= row_lng <= max_lng):
+            continue
+        distance = haversine_m(geo['lat'], geo['lng'], row_lat, row_lng)
+        if geo['radius_m'] is not None and distance > geo['radius_m']:
+            continue
+        row['distance_m'] = round(distance, 1)
+        ranked.append(row)
+
+    ranked.sort(key=lambda r: (r['distance_m'], r.get('id') or 0))
+    if geo['after']:
+        ranked = [r for r in ranked if (r['distance_m'], r.get('id') or 0) > geo['after']]
+
+    page_rows = ranked[:geo['limit']]
+    next_cursor = None
+    if len(ranked) > geo['limit'] and page_rows:
+        next_cursor = encode_cursor(page_rows[-1]['distance_m'], page_rows[-1].get('id'))
+    return page_rows, next_cursor
+
+def geo_response_fields(geo, next_cursor):
+    """Extra response keys describing a location search page"""
+    return {
+        'geo': {
+            'lat': geo['lat'],
+            'lng': geo['lng'],
+            'radius_m': geo['radius_m'],
+            'bbox': list(geo['bbox'])
+        },
+        'limit': geo['limit'],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+
 def save_issue_to_supabase(issue_data, firebase_token=None):
     """Save issue data to Supabase database with Firebase authentication context"""
     try:
@@ -288,55 +995,27 @@ def create_issue():
             log_response(error_response, 400)
             return jsonify(error_response), 400
         
-        # Handle image file if present
-        image_url = None
-        image_filename = None
-        if 'image' in request.files:
-            image_file = request.files['image']
-            if image_file.filename != '':
-                # Create a clean filename
-                original_filename = secure_filename(f"{title}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_issue_image.jpg")
-                
-                # Upload to Supabase Storage
-                upload_result = upload_to_supabase_storage(image_file, original_filename)
-                
-                if upload_result['success']:
-                    image_url = upload_result['url']
-                    image_filename = upload_result['filename']
-                    print(f"✓ Image uploaded to Supabase Storage: {image_url}")
-                else:
-                    print(f"✗ Failed to upload image to Supabase Storage: {upload_result['error']}")
-                    # Fallback to local storage for backwards compatibility
-                    image_file.seek(0)  # Reset file pointer
-                    image_filename = original_filename
-                    image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
-                    image_file.save(image_path)
-                    print(f"✓ Image saved locally as fallback: {image_path}")
-        
-        # Handle audio file if present
-        audio_url = None
-        audio_filename = None
-        if 'audio' in request.files:
-            audio_file = request.files['audio']
-            if audio_file.filename != '':
-                # Create a clean filename  
-                original_audio_filename = secure_filename(f"{title}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_issue_audio.webm")
-                
-                # Upload to Supabase Storage
-                upload_result = upload_to_supabase_storage(audio_file, original_audio_filename, 'Civic-Audio-Bucket')
-                
-                if upload_result['success']:
-                    audio_url = upload_result['url']
-                    audio_filename = upload_result['filename']
-                    print(f"✓ Audio uploaded to Supabase Storage: {audio_url}")
-                else:
-                    print(f"✗ Failed to upload audio to Supabase Storage: {upload_result['error']}")
-                    # Fallback to local storage for backwards compatibility
-                    audio_file.seek(0)  # Reset file pointer
-                    audio_filename = original_audio_filename
-                    audio_path = os.path.join(app.config['UPLOAD_FOLDER'], audio_filename)
-                    audio_file.save(audio_path)
-                    print(f"✓ Audio saved locally as fallback: {audio_path}")
+        # With the media pipeline on, files are only spooled here and uploaded after the insert
+        spooled_media = None
+        if MEDIA_PIPELINE_ENABLED and supabase:
+            uploads = {kind: request.files[kind] for kind in MEDIA_KINDS
+                       if kind in request.files and request.files[kind].filename != ''}
+            if uploads:
+                spooled_media = media_pipeline.spool(uploads, title)
+        
+        # Otherwise upload image and audio concurrently before the insert
+        media_fields = {}
+        # Derivatives of a photo uploaded here are rendered from a local copy, off this request
+        variant_source_path = None
+        if spooled_media is None:
+            uploads = {kind: request.files[kind] for kind in MEDIA_KINDS
+                       if kind in request.files and request.files[kind].filename != ''}
+            if uploads:
+                media_fields, variant_source_path = upload_request_media(uploads, title, keep_image=image_variants_enabled())
+        image_url = media_fields.get('image_url')
+        image_filename = media_fields.get('image_filename')
+        audio_url = media_fields.get('audio_url')
+        audio_filename = media_fields.get('audio_filename')
         
         # Create issue data
         issue_data = {
@@ -356,6 +1035,8 @@ def create_issue():
             'status': 'Open',
             'created_at': datetime.now().isoformat()
         }
+        if spooled_media is not None:
+            issue_data['media_status'] = 'pending'
         
         print(f"🔍 CREATE ISSUE DEBUG: Issue data to save:")
         print(f"   - user_id: {issue_data['user_id']} (type: {type(issue_data['user_id'])})")
@@ -372,6 +1053,13 @@ def create_issue():
         saved_issue = save_issue_to_supabase(issue_data, firebase_token)
         
         if saved_issue:
+            invalidate_issue_feeds('issue created')
+            vouch_ranking.upsert(saved_issue)
+            event_hub.publish('issue_created', issue_event(saved_issue))
+            if spooled_media is not None:
+                media_pipeline.submit(saved_issue['id'], spooled_media, 'database')
+            if variant_source_path:
+                schedule_image_variants(saved_issue['id'], 'database', variant_source_path)
             # Successfully saved to Supabase
             response_data = {
                 'message': 'Issue created successfully and saved to database',
@@ -383,6 +1071,13 @@ def create_issue():
             # Fallback to memory storage
             issue_data['id'] = len(issues) + 1
             issues.append(issue_data)
+            invalidate_issue_feeds('issue created (memory)')
+            vouch_ranking.upsert(issue_data)
+            event_hub.publish('issue_created', issue_event(issue_data))
+            if spooled_media is not None:
+                media_pipeline.submit(issue_data['id'], spooled_media, 'memory')
+            if variant_source_path:
+                schedule_image_variants(issue_data['id'], 'memory', variant_source_path)
             response_data = {
                 'message': 'Issue created successfully (saved locally)',
                 'issue': issue_data,
@@ -407,36 +1102,51 @@ def test_connection():
     return jsonify(response_data)
 
 @app.route('/api/issues', methods=['GET'])
+@cached_feed('issues')
 def get_issues():
-    """Get all issues from Supabase or memory storage with vouch counts"""
+    """
+    Get issues from Supabase or memory storage with vouch counts.
+
+    Optional keyset pagination: ?limit=N&cursor=<next_cursor from the previous page>.
+    Without either parameter the full list is returned as before.
+    """
     log_api_access('/api/issues', 'GET', request.remote_addr)
     
+    try:
+        page = parse_page_args()
+        fields = parse_fields_arg('id', 'created_at')
+    except ValueError as e:
+        error_response = {'error': str(e)}
+        log_response(error_response, 400)
+        return jsonify(error_response), 400
+    
     try:
         if supabase:
             print("🔍 Fetching issues from Supabase database...")
             
             # Try to use the issue_vouch_counts view for unrestricted access with accurate vouch data
             try:
-                vouch_result = supabase.table('issue_vouch_counts').select('*').order('created_at', desc=True).execute()
+                query = supabase.table('issue_vouch_counts').select(view_select(fields))
+                if page:
+                    query = apply_keyset_page(query, page)
+                else:
+                    query = query.order('created_at', desc=True)
+                vouch_result = query.execute()
                 
-                if vouch_result.data:
+                if vouch_result.data or page:
+                    rows = vouch_result.data or []
+                    next_cursor = None
+                    if page:
+                        rows, next_cursor = finish_page(rows, page)
+                    
                     # Add compatible fields for frontend
-                    for issue in vouch_result.data:
-                        issue['vouch_count'] = issue.get('vouch_count', issue.get('vouch_priority', 0))
-                        # Add missing media fields if not present
-                        if 'image_filename' not in issue:
-                            issue['image_filename'] = None
-                        if 'audio_filename' not in issue:
-                            issue['audio_filename'] = None
-                        if 'image_url' not in issue:
-                            issue['image_url'] = None
-                        if 'audio_url' not in issue:
-                            issue['audio_url'] = None
-                        if 'description_mode' not in issue:
-                            issue['description_mode'] = None
+                    for issue in rows:
+                        add_frontend_defaults(issue, fields)
                     
-                    response_data = {'issues': vouch_result.data, 'source': 'issue_vouch_counts_view', 'count': len(vouch_result.data)}
-                    print(f"✓ Found {len(vouch_result.data)} issues with vouch data from unrestricted view")
+                    response_data = {'issues': rows, 'source': 'issue_vouch_counts_view', 'count': len(rows)}
+                    if page:
+                        response_data.update({'limit': page['limit'], 'next_cursor': next_cursor, 'has_more': next_cursor is not None})
+                    print(f"✓ Found {len(rows)} issues with vouch data from unrestricted view")
                     log_response(response_data, 200)
                     return jsonify(response_data)
                     
@@ -445,22 +1155,39 @@ def get_issues():
                 # Fallback to regular issues table
             
             # Fallback: use regular issues table
-            select_fields = 'id,title,description,latitude,longitude,category,priority,vouch_priority,status,created_at,image_filename,audio_filename,image_url,audio_url,description_mode'
-            result = supabase.table('issues').select(select_fields).order('created_at', desc=True).execute()
+            select_fields = with_media_columns('id,title,description,latitude,longitude,category,priority,vouch_priority,status,created_at,image_filename,audio_filename,image_url,audio_url,description_mode')
+            query = supabase.table('issues').select(table_select(fields, select_fields))
+            if page:
+                query = apply_keyset_page(query, page)
+            else:
+                query = query.order('created_at', desc=True)
+            result = query.execute()
             
-            if result.data:
+            if result.data or page:
+                rows = result.data or []
+                next_cursor = None
+                if page:
+                    rows, next_cursor = finish_page(rows, page)
+                
                 # Add vouch_count field using the existing vouch_priority for consistency
-                for issue in result.data:
-                    issue['vouch_count'] = issue.get('vouch_priority', 0)
+                for issue in rows:
+                    add_frontend_defaults(issue, fields, from_view=False)
                 
-                response_data = {'issues': result.data, 'source': 'database', 'count': len(result.data)}
-                print(f"✓ Found {len(result.data)} issues in database (fallback mode)")
+                response_data = {'issues': rows, 'source': 'database', 'count': len(rows)}
+                if page:
+                    response_data.update({'limit': page['limit'], 'next_cursor': next_cursor, 'has_more': next_cursor is not None})
+                print(f"✓ Found {len(rows)} issues in database (fallback mode)")
                 log_response(response_data, 200)
                 return jsonify(response_data)
         
         # Fallback to memory storage
         print("💾 Using memory storage fallback...")
-        response_data = {'issues': issues, 'source': 'memory', 'count': len(issues)}
+        if page:
+            rows, next_cursor = paginate_in_memory(issues, page)
+            response_data = {'issues': rows, 'source': 'memory', 'count': len(rows),
+                             'limit': page['limit'], 'next_cursor': next_cursor, 'has_more': next_cursor is not None}
+        else:
+            response_data = {'issues': issues, 'source': 'memory', 'count': len(issues)}
         log_response(response_data, 200)
         return jsonify(response_data)
         
@@ -471,16 +1198,26 @@ def get_issues():
         return jsonify(error_response)
 
 @app.route('/api/issues/vouch-details', methods=['GET'])
+@cached_feed('vouch-details')
 def get_all_issues_with_vouch_details():
-    """Get all issues with detailed vouch information using unrestricted view"""
+    """
+    Get all issues with detailed vouch information using unrestricted view.
+
+    ?fields= limits the columns; the voucher list is only aggregated when `vouchers` is requested.
+    """
     log_api_access('/api/issues/vouch-details', 'GET', request.remote_addr)
     
+    try:
+        fields = parse_fields_arg('id')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         if supabase:
             print("🔍 Fetching detailed issue vouch data from unrestricted view...")
             
             # Use the issue_vouch_counts view for complete vouch details
-            result = supabase.table('issue_vouch_counts').select('*').order('vouch_count', desc=True).execute()
+            result = supabase.table('issue_vouch_counts').select(view_select(fields)).order('vouch_count', desc=True).execute()
             
             if result.data:
                 response_data = {
@@ -488,7 +1225,7 @@ def get_all_issues_with_vouch_details():
                     'source': 'issue_vouch_counts_view', 
                     'count': len(result.data),
                     'includes_vouch_details': True,
-                    'includes_voucher_list': True
+                    'includes_voucher_list': not fields or 'vouchers' in fields
                 }
                 print(f"✓ Found {len(result.data)} issues with complete vouch details")
                 log_response(response_data, 200)
@@ -504,10 +1241,25 @@ def get_all_issues_with_vouch_details():
         return jsonify({'error': str(e), 'issues': [], 'count': 0}), 500
 
 @app.route('/api/issues/nearby', methods=['GET'])
+@cached_feed('nearby', per_user=True)
 def get_nearby_issues():
-    """Get issues excluding those reported by the current user (for homepage)"""
+    """
+    Get issues excluding those reported by the current user (for homepage).
+
+    Optional location search: ?lat=&lng=&radius_m= and/or ?bbox=min_lng,min_lat,max_lng,max_lat,
+    paginated with ?limit=&cursor=. Matches are sorted by distance and carry `distance_m`.
+    """
     log_api_access('/api/issues/nearby', 'GET', request.remote_addr)
     
+    try:
+        geo = parse_geo_args()
+        required = ('id', 'user_id', 'latitude', 'longitude') if geo else ('id', 'user_id')
+        fields = parse_fields_arg(*required)
+    except ValueError as e:
+        error_response = {'error': str(e)}
+        log_response(error_response, 400)
+        return jsonify(error_response), 400
+    
     try:
         # Extract current user information from authentication token
         current_user_id = None
@@ -539,149 +1291,92 @@ def get_nearby_issues():
         
         if supabase:
             print("🔍 Fetching nearby issues (excluding user's own issues)...")
+            if current_user_id is not None:
+                print(f"🔍 FILTERING: Excluding issues of user {current_user_id} in the database query")
+            else:
+                print("ℹ️ FILTERING: No authentication provided - showing all issues")
             
             # Try to use the issue_vouch_counts view first
             try:
-                result = supabase.table('issue_vouch_counts').select('*').order('created_at', desc=True).execute()
+                def view_query():
+                    query = supabase.table('issue_vouch_counts').select(view_select(fields))
+                    return exclude_user_issues(query, current_user_id)
                 
-                if result.data:
-                    # Filter out current user's issues if user is authenticated
-                    filtered_issues = result.data
-                    original_count = len(result.data)
-                    
-                    if current_user_id:
-                        print(f"🔍 FILTERING DEBUG: Current user ID: {current_user_id} (type: {type(current_user_id)})")
-                        print(f"🔍 FILTERING DEBUG: Total issues from view: {original_count}")
-                        
-                        # Log sample issues for debugging
-                        for i, issue in enumerate(result.data[:3]):
-                            issue_user_id = issue.get('user_id')
-                            print(f"🔍 FILTERING DEBUG: Issue {i+1}:")
-                            print(f"   - Issue ID: {issue.get('id')}")
-                            print(f"   - Issue user_id: {issue_user_id} (type: {type(issue_user_id)})")
-                            print(f"   - Title: {issue.get('title', 'No title')[:30]}...")
-                            print(f"   - Match current user? {issue_user_id == current_user_id}")
-                        
-                        # Enhanced filtering with type conversion handling
-                        def should_exclude_issue(issue):
-                            issue_user_id = issue.get('user_id')
-                            
-                            # Handle None cases
-                            if issue_user_id is None or current_user_id is None:
-                                return False
-                            
-                            # Convert both to same type for comparison
-                            try:
-                                # Try to convert both to integers for comparison
-                                issue_user_id_int = int(issue_user_id)
-                                current_user_id_int = int(current_user_id)
-                                return issue_user_id_int == current_user_id_int
-                            except (ValueError, TypeError):
-                                # Fallback to string comparison
-                                return str(issue_user_id) == str(current_user_id)
-                        
-                        # Filter out issues reported by current user
-                        filtered_issues = [issue for issue in result.data if not should_exclude_issue(issue)]
-                        filtered_count = len(filtered_issues)
-                        excluded_count = original_count - filtered_count
-                        
-                        print(f"✓ FILTERING RESULT: Excluded {excluded_count} user's own issues")
-                        print(f"✓ FILTERING RESULT: Showing {filtered_count} of {original_count} total issues")
-                        
-                        if excluded_count == 0:
-                            print("⚠️ WARNING: No issues were filtered out - user may not have any issues OR filtering failed")
-                            print(f"⚠️ WARNING: Check if user_id {current_user_id} exists in issues table")
-                    else:
-                        print("ℹ️ FILTERING: No authentication provided - showing all issues")
-                    
-                    # Add compatible fields for frontend
-                    for issue in filtered_issues:
-                        issue['vouch_count'] = issue.get('vouch_count', issue.get('vouch_priority', 0))
-                        # Add missing media fields if not present
-                        if 'image_filename' not in issue:
-                            issue['image_filename'] = None
-                        if 'audio_filename' not in issue:
-                            issue['audio_filename'] = None
-                        if 'image_url' not in issue:
-                            issue['image_url'] = None
-                        if 'audio_url' not in issue:
-                            issue['audio_url'] = None
-                        if 'description_mode' not in issue:
-                            issue['description_mode'] = None
-                    
-                    response_data = {
-                        'issues': filtered_issues, 
-                        'source': 'issue_vouch_counts_view_filtered', 
-                        'count': len(filtered_issues),
-                        'original_count': original_count,
-                        'excluded_count': excluded_count,
-                        'excluded_user_issues': current_user_id is not None,
-                        'current_user_id': current_user_id,
-                        'user_info': {
-                            'id': current_user_id,
-                            'mobile_number': current_user_info.get('mobile_number') if current_user_info else None,
-                            'firebase_uid': current_user_info.get('firebase_uid') if current_user_info else None
-                        } if current_user_info else None
-                    }
-                    print(f"✓ VIEW RESULT: Returning {len(filtered_issues)} nearby issues (excluded {excluded_count} user's own)")
-                    log_response(response_data, 200)
-                    return jsonify(response_data)
-                    
-            except Exception as view_error:
-                print(f"⚠️ issue_vouch_counts view not available: {view_error}")
-                # Fallback to regular issues table
-            
-            # Fallback: use regular issues table with user filtering
-            print("🔍 FALLBACK: Using regular issues table")
-            select_fields = 'id,title,description,latitude,longitude,category,priority,vouch_priority,status,created_at,image_filename,audio_filename,image_url,audio_url,description_mode,user_id'
-            
-            # Always fetch all issues first, then filter in Python for consistency
-            result = supabase.table('issues').select(select_fields).order('created_at', desc=True).execute()
-            
-            if result.data:
-                original_count = len(result.data)
-                filtered_issues = result.data
-                
-                if current_user_id:
-                    print(f"🔍 FALLBACK FILTERING: User ID: {current_user_id}, Original count: {original_count}")
-                    
-                    # Apply same filtering logic as above
-                    def should_exclude_issue(issue):
-                        issue_user_id = issue.get('user_id')
-                        
-                        if issue_user_id is None or current_user_id is None:
-                            return False
-                        
-                        try:
-                            issue_user_id_int = int(issue_user_id)
-                            current_user_id_int = int(current_user_id)
-                            return issue_user_id_int == current_user_id_int
-                        except (ValueError, TypeError):
-                            return str(issue_user_id) == str(current_user_id)
-                    
-                    filtered_issues = [issue for issue in result.data if not should_exclude_issue(issue)]
-                    excluded_count = original_count - len(filtered_issues)
-                    print(f"✓ FALLBACK FILTERING: Excluded {excluded_count} user's own issues")
+                next_cursor = None
+                if geo:
+                    try:
+                        filtered_issues, next_cursor = fetch_nearby_page(geo, current_user_id, fields)
+                    except Exception as rpc_error:
+                        print(f"⚠️ nearby_issues() not available, scanning the bounding box: {rpc_error}")
+                        filtered_issues, next_cursor = rank_by_distance(fetch_bbox_rows(view_query, geo), geo)
+                else:
+                    filtered_issues = view_query().order('created_at', desc=True).execute().data or []
                 
-                # Add vouch_count field using the existing vouch_priority for consistency
+                # Add compatible fields for frontend
                 for issue in filtered_issues:
-                    issue['vouch_count'] = issue.get('vouch_priority', 0)
+                    add_frontend_defaults(issue, fields)
+                annotate_user_vouched(filtered_issues, current_user_id)
                 
                 response_data = {
                     'issues': filtered_issues, 
-                    'source': 'database_fallback_filtered', 
+                    'source': 'issue_vouch_counts_view_filtered', 
                     'count': len(filtered_issues),
-                    'original_count': original_count,
                     'excluded_user_issues': current_user_id is not None,
-                    'user_id': current_user_id
+                    'current_user_id': current_user_id,
+                    'user_info': {
+                        'id': current_user_id,
+                        'mobile_number': current_user_info.get('mobile_number') if current_user_info else None,
+                        'firebase_uid': current_user_info.get('firebase_uid') if current_user_info else None
+                    } if current_user_info else None
                 }
-                print(f"✓ FALLBACK RESULT: Returning {len(filtered_issues)} nearby issues from database")
+                if geo:
+                    response_data.update(geo_response_fields(geo, next_cursor))
+                print(f"✓ VIEW RESULT: Returning {len(filtered_issues)} nearby issues")
                 log_response(response_data, 200)
                 return jsonify(response_data)
+                    
+            except Exception as view_error:
+                print(f"⚠️ issue_vouch_counts view not available: {view_error}")
+                # Fallback to regular issues table
+            
+            # Fallback: use regular issues table with user filtering
+            print("🔍 FALLBACK: Using regular issues table")
+            select_fields = with_media_columns('id,title,description,latitude,longitude,category,priority,vouch_priority,status,created_at,image_filename,audio_filename,image_url,audio_url,description_mode,user_id')
+            
+            def table_query():
+                query = supabase.table('issues').select(table_select(fields, select_fields))
+                return exclude_user_issues(query, current_user_id)
+            
+            next_cursor = None
+            if geo:
+                filtered_issues, next_cursor = rank_by_distance(fetch_bbox_rows(table_query, geo), geo)
+            else:
+                filtered_issues = table_query().order('created_at', desc=True).execute().data or []
+            
+            # Add vouch_count field using the existing vouch_priority for consistency
+            for issue in filtered_issues:
+                add_frontend_defaults(issue, fields, from_view=False)
+            annotate_user_vouched(filtered_issues, current_user_id)
+            
+            response_data = {
+                'issues': filtered_issues, 
+                'source': 'database_fallback_filtered', 
+                'count': len(filtered_issues),
+                'excluded_user_issues': current_user_id is not None,
+                'user_id': current_user_id
+            }
+            if geo:
+                response_data.update(geo_response_fields(geo, next_cursor))
+            print(f"✓ FALLBACK RESULT: Returning {len(filtered_issues)} nearby issues from database")
+            log_response(response_data, 200)
+            return jsonify(response_data)
         
         # Fallback to memory storage
         print("💾 Using memory storage fallback for nearby issues...")
         memory_issues = issues
+        next_cursor = None
+        if geo:
+            memory_issues, next_cursor = rank_by_distance([dict(issue) for issue in issues], geo)
         
         # Note: Memory storage might not have user_id filtering capability
         response_data = {
@@ -691,6 +1386,8 @@ def get_nearby_issues():
             'excluded_user_issues': False,
             'user_id': None
         }
+        if geo:
+            response_data.update(geo_response_fields(geo, next_cursor))
         log_response(response_data, 200)
         return jsonify(response_data)
         
@@ -700,6 +1397,200 @@ def get_nearby_issues():
         log_response(error_response, 200)
         return jsonify(error_response)
 
+# Delta sync: issues changed since the client's last sync token
+SYNC_SELECT_FIELDS = 'id,user_id,title,description,latitude,longitude,category,priority,vouch_priority,status,created_at,updated_at,image_filename,audio_filename,image_url,audio_url,description_mode'
+
+@app.route('/api/issues/changes', methods=['GET'])
+@cached_feed('changes')
+def get_issue_changes():
+    """
+    Get issues created, updated or re-vouched since a sync token, plus tombstones for deleted ones.
+
+    ?since=<next_since from the previous call> (omit for an initial full sync), ?limit=N.
+    Changes are ordered by (updated_at, id); keep calling with next_since while has_more is true.
+    Relies on the updated_at triggers from database_schema.sql and delta_sync.sql.
+    """
+    log_api_access('/api/issues/changes', 'GET', request.remote_addr)
+    
+    try:
+        limit = parse_limit_arg(request.args.get('limit'))
+        since = None
+        if request.args.get('since'):
+            since_ts, since_id = decode_cursor(request.args['since'])
+            since = (parse_cursor_timestamp(since_ts), since_id)
+    except ValueError as e:
+        error_response = {'error': str(e)}
+        log_response(error_response, 400)
+        return jsonify(error_response), 400
+    
+    try:
+        if supabase:
+            query = supabase.table('issues').select(SYNC_SELECT_FIELDS)
+            query.params = query.params.add('order', 'updated_at.asc,id.asc')
+            if since:
+                query.params = query.params.add(
+                    'or', f'(updated_at.gt."{since[0]}",and(updated_at.eq."{since[0]}",id.gt.{since[1]}))'
+                )
+            result = query.limit(limit + 1).execute()
+            
+            rows = result.data or []
+            has_more = len(rows) > limit
+            changes = rows[:limit]
+            for issue in changes:
+                issue['vouch_count'] = issue.get('vouch_priority', 0)
+            
+            # Tombstones up to the end of this page (everything newer once the backlog is drained)
+            tombstones = []
+            tombstones_supported = True
+            try:
+                tomb_query = supabase.table('issue_tombstones').select('issue_id,deleted_at').order('deleted_at')
+                if since:
+                    tomb_query = tomb_query.gt('deleted_at', since[0])
+                if has_more:
+                    tomb_query = tomb_query.lte('deleted_at', changes[-1]['updated_at'])
+                tombstones = tomb_query.execute().data or []
+            except Exception as tomb_error:
+                print(f"⚠️ issue_tombstones not available: {tomb_error}")
+                tombstones_supported = False
+            
+            # New watermark: the last change on this page, or the newest tombstone if later
+            watermark = since
+            if changes:
+                watermark = (changes[-1]['updated_at'], changes[-1]['id'])
+            if tombstones and not has_more:
+                last_deleted_at = tombstones[-1]['deleted_at']
+                if watermark is None or datetime.fromisoformat(last_deleted_at) > datetime.fromisoformat(watermark[0]):
+                    watermark = (last_deleted_at, 0)
+            
+            response_data = {
+                'changes': changes,
+                'tombstones': [t['issue_id'] for t in tombstones],
+                'count': len(changes),
+                'next_since': encode_cursor(*watermark) if watermark else request.args.get('since'),
+                'has_more': has_more,
+                'full_resync': since is None,
+                'tombstones_supported': tombstones_supported,
+                'source': 'database'
+            }
+            print(f"✓ DELTA SYNC: {len(changes)} changed, {len(tombstones)} removed (has_more={has_more})")
+            log_response(response_data, 200)
+            return jsonify(response_data)
+        
+        # Memory storage has no change tracking, so always hand back a full snapshot
+        response_data = {
+            'changes': issues,
+            'tombstones': [],
+            'count': len(issues),
+            'next_since': None,
+            'has_more': False,
+            'full_resync': True,
+            'tombstones_supported': False,
+            'source': 'memory'
+        }
+        log_response(response_data, 200)
+        return jsonify(response_data)
+        
+    except Exception as e:
+        print(f"❌ Error fetching issue changes: {e}")
+        error_response = {'error': str(e), 'changes': [], 'tombstones': [], 'count': 0}
+        log_response(error_response, 500)
+        return jsonify(error_response), 500
+
+# Streaming export for large result sets (admin views, CSV/BI exports)
+EXPORT_PAGE_SIZE = 500
+MAX_EXPORT_PAGE_SIZE = 1000  # PostgREST's default max-rows
+
+def iter_issue_pages(table_name, select_fields, page_size):
+    """Yield lists of rows from Supabase page by page using the (created_at, id) keyset"""
+    page = {'limit': page_size, 'after': None}
+    while True:
+        rows = apply_keyset_page(supabase.table(table_name).select(select_fields), page).execute().data or []
+        rows, next_cursor = finish_page(rows, page)
+        if rows:
+            yield rows
+        if not next_cursor:
+            return
+        page['after'] = (str(rows[-1].get('created_at')), rows[-1].get('id'))
+
+def stream_issue_rows(pages, fmt, source):
+    """
+    Serialize pages of issues as they arrive, so peak memory is one page rather than the table.
+
+    fmt 'ndjson' emits one issue per line; 'json' emits {"issues": [...], "count": N, "source": ...}.
+    A failure mid-stream is reported in-band (a trailing "error" key / line) since the status is sent.
+    """
+    dumps = app.json.dumps
+    count = 0
+    error = None
+    if fmt == 'json':
+        yield '{"issues":['
+    try:
+        for rows in pages:
+            for issue in rows:
+                if fmt == 'ndjson':
+                    yield dumps(issue) + '\n'
+                else:
+                    yield (',' if count else '') + dumps(issue)
+                count += 1
+    except Exception as e:
+        error = str(e)
+        print(f"❌ Export stream failed after {count} rows: {e}")
+    if fmt == 'ndjson':
+        if error:
+            yield dumps({'error': error, 'count': count}) + '\n'
+    else:
+        tail = {'count': count, 'source': source}
+        if error:
+            tail['error'] = error
+        yield '],' + dumps(tail)[1:]
+    print(f"📤 STREAMED {count} issues ({fmt}, source: {source}){' with error' if error else ''}")
+
+@app.route('/api/issues/export', methods=['GET'])
+def export_issues():
+    """
+    Stream every issue as JSON or NDJSON without building the full list in memory.
+
+    ?format=json|ndjson (default json), ?page_size=N rows per Supabase round trip,
+    ?fields= projection as on the list endpoints.
+    """
+    log_api_access('/api/issues/export', 'GET', request.remote_addr)
+    
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'ndjson'):
+        return jsonify({'error': 'format must be json or ndjson'}), 400
+    try:
+        page_size = int(request.args.get('page_size', EXPORT_PAGE_SIZE))
+        if page_size < 1:
+            raise ValueError
+        page_size = min(page_size, MAX_EXPORT_PAGE_SIZE)
+        fields = parse_fields_arg('id', 'created_at')
+    except ValueError as e:
+        return jsonify({'error': str(e) or 'page_size must be a positive integer'}), 400
+    
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    
+    if supabase:
+        # Fetch the first page eagerly so a missing view can still fall back to the issues table
+        try:
+            pages = iter_issue_pages('issue_vouch_counts', view_select(fields), page_size)
+            first = next(pages, [])
+            source = 'issue_vouch_counts_view'
+        except Exception as view_error:
+            print(f"⚠️ issue_vouch_counts view not available for export: {view_error}")
+            pages = iter_issue_pages('issues', table_select(fields, '*'), page_size)
+            first = next(pages, [])
+            source = 'database'
+        
+        def all_pages():
+            if first:
+                yield first
+            yield from pages
+        
+        return app.response_class(stream_with_context(stream_issue_rows(all_pages(), fmt, source)), mimetype=mimetype)
+    
+    # Fallback to memory storage
+    return app.response_class(stream_issue_rows([list(issues)], fmt, 'memory'), mimetype=mimetype)
+
 @app.route('/api/debug/user-issues', methods=['GET'])
 def debug_user_issues():
     """Debug endpoint to check user's issues and filtering logic"""
@@ -757,6 +1648,699 @@ def debug_user_issues():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Live updates over Server-Sent Events, fed by an in-process pub/sub hub
+STREAM_EVENT_TYPES = ('issue_created', 'vouch_count_changed', 'status_changed', 'media_ready')
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '256'))
+SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', '500'))
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_REPLAY_EVENTS = 1024
+
+class EventSubscriber:
+    def __init__(self, types, queue_size):
+        self.types = types
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+        self.needs_resync = False
+
+class EventHub:
+    """
+    Fan-out of issue events to connected stream clients.
+
+    Each event is serialized once into an SSE frame. Every client has a bounded queue; a
+    client that falls a full queue behind is disconnected with a `resync` event instead of
+    letting its backlog grow, so one slow reader cannot hold memory or block publishers.
+    Recent frames are kept so a reconnect with Last-Event-ID can catch up.
+    """
+
+    def __init__(self, queue_size, max_clients, replay_size):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._recent = deque(maxlen=replay_size)  # (event_id, event_type, frame)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'delivered': 0, 'overflow_disconnects': 0, 'rejected_clients': 0}
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            payload = json.dumps(data, separators=(',', ':'), default=str)
+            frame = f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+            self._recent.append((event_id, event_type, frame))
+            self._stats['published'] += 1
+            subscribers = list(self._subscribers)
+
+        delivered = 0
+        for subscriber in subscribers:
+            if subscriber.types and event_type not in subscriber.types:
+                continue
+            try:
+                subscriber.queue.put_nowait(frame)
+                delivered += 1
+            except queue.Full:
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+                with self._lock:
+                    self._stats['overflow_disconnects'] += 1
+        with self._lock:
+            self._stats['delivered'] += delivered
+
+    def subscribe(self, types, last_event_id=None):
+        """Register a client, replaying anything newer than last_event_id. None when full."""
+        subscriber = EventSubscriber(types, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                self._stats['rejected_clients'] += 1
+                return None
+            if last_event_id is not None:
+                missed = [(event_type, frame) for event_id, event_type, frame in self._recent if event_id > last_event_id]
+                oldest = self._recent[0][0] if self._recent else self._next_id
+                # Too old to replay, or from before a server restart (ids start over)
+                if last_event_id + 1 < oldest or last_event_id >= self._next_id or len(missed) > self.queue_size:
+                    subscriber.needs_resync = True
+                else:
+                    for event_type, frame in missed:
+                        if not types or event_type in types:
+                            subscriber.queue.put_nowait(frame)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def resync_frame(self):
+        """resync event carrying the latest id, so the reconnect does not replay what the refetch covers"""
+        with self._lock:
+            return f"id: {self._next_id - 1}\nevent: resync\ndata: {{}}\n\n"
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'max_clients': self.max_clients,
+                'queue_size': self.queue_size,
+                'last_event_id': self._next_id - 1,
+                **self._stats
+            }
+
+event_hub = EventHub(SSE_QUEUE_SIZE, SSE_MAX_CLIENTS, SSE_REPLAY_EVENTS)
+
+def issue_event(row):
+    """Compact issue summary for issue_created events"""
+    event = {field: row.get(field) for field in RANKING_FIELDS}
+    if event['vouch_count'] is None:
+        event['vouch_count'] = row.get('vouch_priority') or 0
+    return event
+
+def publish_vouch_count(issue_id, vouch_count):
+    event_hub.publish('vouch_count_changed', {'id': issue_id, 'vouch_count': vouch_count})
+
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    """Server-Sent Events: issue_created, vouch_count_changed and status_changed"""
+    log_api_access('/api/stream', 'GET', request.remote_addr)
+    
+    types_arg = request.args.get('types')
+    types = None
+    if types_arg:
+        types = {t.strip() for t in types_arg.split(',') if t.strip()}
+        unknown = types - set(STREAM_EVENT_TYPES)
+        if unknown:
+            return jsonify({'error': f"Unknown event types: {', '.join(sorted(unknown))}", 'allowed': list(STREAM_EVENT_TYPES)}), 400
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    subscriber = event_hub.subscribe(types, last_event_id)
+    if subscriber is None:
+        response = jsonify({'error': 'Too many stream clients, poll the list endpoints instead'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            if subscriber.needs_resync:
+                yield event_hub.resync_frame()
+            while True:
+                if subscriber.overflowed:
+                    # Too far behind: the client should refetch the list and reconnect
+                    yield event_hub.resync_frame()
+                    return
+                try:
+                    yield subscriber.queue.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+        finally:
+            event_hub.unsubscribe(subscriber)
+    
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Top-K "most vouched" leaderboard served from an in-memory ranking index
+TOP_ISSUES_MAX_K = 100
+TOP_ISSUES_REFRESH_SECONDS = int(os.getenv('TOP_ISSUES_REFRESH_SECONDS', '300'))
+RANKING_FIELDS = ('id', 'title', 'category', 'status', 'priority', 'vouch_count', 'created_at', 'latitude', 'longitude')
+
+class VouchRanking:
+    """
+    Issues ordered by vouch count, one sorted list per category plus a global one.
+
+    Each list holds (-vouch_count, -id) keys, so reading the top k is a slice walk (O(k)) and
+    an update is a bisect lookup plus insert (O(log n) comparisons). Vouches made through
+    other worker processes are picked up by a full rebuild every refresh_seconds.
+    """
+
+    ALL = '*'
+
+    def __init__(self, refresh_seconds=300):
+        self.refresh_seconds = refresh_seconds
+        self._issues = {}      # issue_id -> summary row
+        self._ranked = {}      # category (or ALL) -> sorted list of (-vouch_count, -id)
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(row):
+        return (-(row.get('vouch_count') or 0), -row['id'])
+
+    def _insert(self, row):
+        key = self._key(row)
+        for bucket in (self.ALL, row.get('category')):
+            bisect.insort(self._ranked.setdefault(bucket, []), key)
+
+    def _discard(self, row):
+        key = self._key(row)
+        for bucket in (self.ALL, row.get('category')):
+            ranked = self._ranked.get(bucket)
+            if not ranked:
+                continue
+            index = bisect.bisect_left(ranked, key)
+            if index < len(ranked) and ranked[index] == key:
+                del ranked[index]
+
+    def rebuild(self, rows):
+        """Replace the index. Returns (id, field, value) for count/status changes since the last build."""
+        with self._lock:
+            previous = self._issues
+            self._issues = {}
+            self._ranked = {}
+            for row in rows:
+                self.upsert(row)
+            self._loaded_at = time.monotonic()
+            changes = []
+            for issue_id, summary in self._issues.items():
+                before = previous.get(issue_id)
+                if before is None:
+                    continue
+                for field in ('vouch_count', 'status'):
+                    if before.get(field) != summary.get(field):
+                        changes.append((issue_id, field, summary.get(field)))
+            return changes
+
+    def upsert(self, row):
+        """Add or replace an issue (e.g. after create_issue())"""
+        if row.get('id') is None:
+            return
+        summary = {field: row.get(field) for field in RANKING_FIELDS}
+        if summary['vouch_count'] is None:
+            summary['vouch_count'] = row.get('vouch_priority') or 0
+        with self._lock:
+            existing = self._issues.get(summary['id'])
+            if existing:
+                self._discard(existing)
+            self._issues[summary['id']] = summary
+            self._insert(summary)
+
+    def set_count(self, issue_id, vouch_count):
+        """Move an issue to its new vouch count. Returns False if the issue is not indexed."""
+        with self._lock:
+            existing = self._issues.get(issue_id)
+            if existing is None:
+                return False
+            self._discard(existing)
+            existing['vouch_count'] = vouch_count
+            self._insert(existing)
+            return True
+
+    def count(self, issue_id):
+        with self._lock:
+            existing = self._issues.get(issue_id)
+            return existing.get('vouch_count') if existing else None
+
+    def set_status(self, issue_id, status):
+        with self._lock:
+            if issue_id in self._issues:
+                self._issues[issue_id]['status'] = status
+
+    def top(self, k, category=None, status=None):
+        with self._lock:
+            results = []
+            for neg_count, neg_id in self._ranked.get(category or self.ALL, []):
+                row = self._issues[-neg_id]
+                if status and row.get('status') != status:
+                    continue
+                results.append(dict(row))
+                if len(results) >= k:
+                    break
+            return results
+
+    def is_loaded(self):
+        return self._loaded_at is not None
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'issues': len(self._issues),
+                'categories': len([c for c in self._ranked if c != self.ALL]),
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None
+            }
+
+vouch_ranking = VouchRanking(refresh_seconds=TOP_ISSUES_REFRESH_SECONDS)
+
+# Single-flight state for load_vouch_ranking(): callers that arrive during a rebuild
+# ask for one more pass instead of running their own full scan
+vouch_ranking_refresh = {'running': False, 'again': False}
+vouch_ranking_refresh_lock = threading.Lock()
+
+def load_vouch_ranking():
+    """
+    (Re)build the ranking index, at most one rebuild at a time.
+
+    If a rebuild is already running, this returns immediately and that rebuild runs once more
+    when it finishes, so a caller that just changed the data (e.g. reconciliation) is not lost.
+    """
+    with vouch_ranking_refresh_lock:
+        if vouch_ranking_refresh['running']:
+            vouch_ranking_refresh['again'] = True
+            return
+        vouch_ranking_refresh['running'] = True
+    while True:
+        try:
+            rebuild_vouch_ranking()
+        except Exception:
+            with vouch_ranking_refresh_lock:
+                vouch_ranking_refresh.update(running=False, again=False)
+            raise
+        with vouch_ranking_refresh_lock:
+            if not vouch_ranking_refresh['again']:
+                vouch_ranking_refresh['running'] = False
+                return
+            vouch_ranking_refresh['again'] = False
+
+def rebuild_vouch_ranking():
+    """Build the ranking index from the database, or from memory storage without Supabase"""
+    if not supabase:
+        publish_ranking_changes(vouch_ranking.rebuild(issues))
+        return
+    try:
+        rows = [row for page in iter_issue_pages('issue_vouch_counts', ','.join(RANKING_FIELDS), MAX_EXPORT_PAGE_SIZE) for row in page]
+    except Exception as view_error:
+        print(f"⚠️ issue_vouch_counts view not available for ranking: {view_error}")
+        fallback_fields = ','.join(f for f in RANKING_FIELDS if f != 'vouch_count') + ',vouch_priority'
+        rows = [row for page in iter_issue_pages('issues', fallback_fields, MAX_EXPORT_PAGE_SIZE) for row in page]
+    publish_ranking_changes(vouch_ranking.rebuild(rows))
+    print(f"✓ Vouch ranking index built with {len(rows)} issues")
+
+def start_vouch_ranking_refresher():
+    """Build the ranking index now and rebuild it every TOP_ISSUES_REFRESH_SECONDS on a daemon thread"""
+    def loop():
+        while True:
+            try:
+                load_vouch_ranking()
+            except Exception as e:
+                print(f"⚠️ Vouch ranking refresh failed: {e}")
+            time.sleep(vouch_ranking.refresh_seconds)
+    
+    thread = threading.Thread(target=loop, name='vouch-ranking-refresher', daemon=True)
+    thread.start()
+    return thread
+
+def publish_ranking_changes(changes):
+    """Stream count/status changes made outside this process (other workers, dashboard edits)"""
+    for issue_id, field, value in changes:
+        if field == 'status':
+            event_hub.publish('status_changed', {'id': issue_id, 'status': value})
+        else:
+            publish_vouch_count(issue_id, value)
+
+def update_vouch_ranking(issue_id, vouch_count):
+    """Apply a successful vouch to the ranking index, fetching the issue if it is not indexed yet"""
+    if vouch_ranking.set_count(issue_id, vouch_count) or not supabase:
+        return
+    try:
+        result = supabase.table('issues').select(','.join(f for f in RANKING_FIELDS if f != 'vouch_count')).eq('id', issue_id).execute()
+        if result.data:
+            vouch_ranking.upsert({**result.data[0], 'vouch_count': vouch_count})
+    except Exception as e:
+        print(f"⚠️ Could not add issue {issue_id} to the ranking index: {e}")
+
+# Per-user set of vouched issue IDs, so user_vouched needs no database round trip
+USER_VOUCH_CACHE_TTL_SECONDS = float(os.getenv('USER_VOUCH_CACHE_TTL_SECONDS', '300'))
+USER_VOUCH_CACHE_MAX_USERS = int(os.getenv('USER_VOUCH_CACHE_MAX_USERS', '10000'))
+USER_VOUCH_COMPACT_THRESHOLD = 1024  # above this many vouches a sorted array('q') replaces the set
+
+class UserVouchIndex:
+    """
+    LRU/TTL cache of user_id -> vouched issue IDs, loaded lazily with one query per user.
+
+    Small sets are Python sets; users with many vouches get a sorted array of int64
+    (8 bytes per ID instead of ~60) searched with bisect. Successful vouches in this process
+    are added copy-on-write, so readers never see a container being mutated; the TTL bounds
+    staleness for vouches made through other workers.
+    """
+
+    def __init__(self, max_users, ttl_seconds):
+        self._cache = TTLCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._loading = {}  # user_id -> [set of issue IDs added while a load is in flight, ...]
+
+    @staticmethod
+    def _compact(issue_ids):
+        if len(issue_ids) > USER_VOUCH_COMPACT_THRESHOLD:
+            return array('q', sorted(issue_ids))
+        return set(issue_ids)
+
+    @staticmethod
+    def _contains(vouched, issue_id):
+        if isinstance(vouched, set):
+            return issue_id in vouched
+        index = bisect.bisect_left(vouched, issue_id)
+        return index < len(vouched) and vouched[index] == issue_id
+
+    def _load(self, user_id):
+        """Read every issue_id this user vouched for, in PostgREST-sized keyset pages"""
+        issue_ids = []
+        last_id = None
+        while True:
+            query = supabase.table('vouches').select('issue_id').eq('user_id', user_id)
+            if last_id is not None:
+                query = query.gt('issue_id', last_id)
+            rows = query.order('issue_id').limit(MAX_EXPORT_PAGE_SIZE).execute().data or []
+            issue_ids.extend(row['issue_id'] for row in rows)
+            if len(rows) < MAX_EXPORT_PAGE_SIZE:
+                return issue_ids
+            last_id = rows[-1]['issue_id']
+
+    def vouched_ids(self, user_id):
+        vouched = self._cache.get(user_id)
+        if vouched is not None:
+            return vouched
+        if not supabase:
+            return set()
+        # Vouches added while the query runs may be missing from its result; they are
+        # collected in `added` and merged in before the set is stored
+        added = set()
+        with self._lock:
+            self._loading.setdefault(user_id, []).append(added)
+        try:
+            issue_ids = self._load(user_id)
+        finally:
+            with self._lock:
+                loads = self._loading[user_id]
+                loads.remove(added)
+                if not loads:
+                    del self._loading[user_id]
+        with self._lock:
+            current = self._cache.peek(user_id)
+            if current is not None:
+                return current
+            vouched = self._compact(set(issue_ids) | added)
+            self._cache.set(user_id, vouched)
+        return vouched
+
+    def has_vouched(self, user_id, issue_id):
+        if user_id is None:
+            return False
+        return self._contains(self.vouched_ids(user_id), issue_id)
+
+    def add(self, user_id, issue_id):
+        """Record a successful vouch in the cached set and in any load still in flight"""
+        if user_id is None:
+            return
+        with self._lock:
+            for added in self._loading.get(user_id, ()):
+                added.add(issue_id)
+            vouched = self._cache.peek(user_id)
+            if vouched is None or self._contains(vouched, issue_id):
+                return
+            if isinstance(vouched, set):
+                updated = self._compact(vouched | {issue_id})
+            else:
+                updated = array('q', vouched)
+                updated.insert(bisect.bisect_left(updated, issue_id), issue_id)
+            self._cache.replace(user_id, updated)
+
+    def stats(self):
+        return self._cache.stats()
+
+user_vouch_index = UserVouchIndex(USER_VOUCH_CACHE_MAX_USERS, USER_VOUCH_CACHE_TTL_SECONDS)
+
+def annotate_user_vouched(feed_issues, user_id):
+    """Set user_vouched on feed items from the cached vouched set"""
+    if user_id is None:
+        return
+    vouched = user_vouch_index.vouched_ids(user_id)
+    for issue in feed_issues:
+        issue['user_vouched'] = UserVouchIndex._contains(vouched, issue.get('id'))
+
+# Optional write-coalescing buffer for authenticated vouches (see vouch_batch.sql)
+VOUCH_BUFFER_ENABLED = os.getenv('VOUCH_BUFFER_ENABLED', 'false').lower() == 'true'
+VOUCH_BUFFER_FLUSH_MS = int(os.getenv('VOUCH_BUFFER_FLUSH_MS', '250'))
+VOUCH_BUFFER_MAX_BATCH = int(os.getenv('VOUCH_BUFFER_MAX_BATCH', '500'))
+VOUCH_BUFFER_MAX_RETRIES = 3
+
+class VouchBuffer:
+    """
+    Collects (user_id, issue_id) vouches in memory and writes them with vouch_issues_batch().
+
+    Duplicates are dropped before they reach the database (pending pairs plus the user's
+    cached vouched set), and each flush is one RPC per max_batch pairs that inserts the rows
+    and applies one count delta per issue in a single transaction.
+
+    Pending vouches live only in this process: anything acknowledged with 202 but not yet
+    flushed is lost if the process crashes or is killed.
+    """
+
+    def __init__(self, flush_ms, max_batch):
+        self.flush_interval = flush_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending = OrderedDict()   # (user_id, issue_id) -> attempts so far
+        self._inflight = set()          # pairs taken by the flush that is writing them right now
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {'accepted': 0, 'duplicates': 0, 'written': 0, 'batches': 0,
+                       'failed_batches': 0, 'dropped': 0, 'last_flush_at': None, 'last_error': None}
+
+    def submit(self, user_id, issue_id):
+        """
+        Queue a vouch. Returns False if this user already vouched (or has one pending).
+
+        The pair only enters user_vouch_index once a flush reports it written, so a batch
+        that is dropped (or a user row the batch skips) never shows up as a vouch.
+        """
+        key = (user_id, issue_id)
+        with self._lock:
+            if key in self._pending or key in self._inflight:
+                self._stats['duplicates'] += 1
+                return False
+        if user_vouch_index.has_vouched(user_id, issue_id):
+            with self._lock:
+                self._stats['duplicates'] += 1
+            return False
+        with self._lock:
+            if key in self._pending or key in self._inflight:
+                self._stats['duplicates'] += 1
+                return False
+            self._pending[key] = 0
+            self._stats['accepted'] += 1
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.set()
+        return True
+
+    def pending_for(self, issue_id):
+        with self._lock:
+            return sum(1 for _, pending_issue in self._pending if pending_issue == issue_id)
+
+    def flush(self):
+        """Write everything pending. Failed batches are re-queued up to VOUCH_BUFFER_MAX_RETRIES times."""
+        with self._lock:
+            batch = self._pending
+            self._pending = OrderedDict()
+            self._inflight.update(batch)
+        if not batch:
+            return 0
+
+        written = 0
+        items = list(batch.items())
+        for start in range(0, len(items), self.max_batch):
+            chunk = items[start:start + self.max_batch]
+            payload = [{'user_id': user_id, 'issue_id': issue_id} for (user_id, issue_id), _ in chunk]
+            try:
+                result = supabase.rpc('vouch_issues_batch', {'vouches_param': payload}).execute()
+                changed = result.data or []
+            except Exception as e:
+                self._requeue(chunk, e)
+                continue
+
+            chunk_written = 0
+            for row in changed:
+                update_vouch_ranking(row['issue_id'], row['vouch_count'])
+                publish_vouch_count(row['issue_id'], row['vouch_count'])
+                user_ids = row.get('user_ids') or []
+                for user_id in user_ids:
+                    user_vouch_index.add(user_id, row['issue_id'])
+                chunk_written += len(user_ids)
+            written += chunk_written
+            with self._lock:
+                self._inflight.difference_update(key for key, _ in chunk)
+                self._stats['batches'] += 1
+                self._stats['written'] += chunk_written
+            if changed:
+                invalidate_issue_feeds(f'{len(changed)} issues vouched (batch)')
+
+        with self._lock:
+            self._stats['last_flush_at'] = datetime.now(timezone.utc).isoformat()
+        print(f"🗳️ Vouch buffer flushed {len(items)} vouches ({written} new)")
+        return written
+
+    def _requeue(self, chunk, error):
+        print(f"❌ Vouch batch failed ({len(chunk)} vouches): {error}")
+        with self._lock:
+            self._stats['failed_batches'] += 1
+            self._stats['last_error'] = str(error)
+            for key, attempts in chunk:
+                self._inflight.discard(key)
+                if attempts + 1 >= VOUCH_BUFFER_MAX_RETRIES:
+                    self._stats['dropped'] += 1
+                else:
+                    self._pending.setdefault(key, attempts + 1)
+
+    def start(self):
+        """Flush every flush_interval (or as soon as a full batch is waiting) on a daemon thread"""
+        if self._thread is not None:
+            return self._thread
+
+        def loop():
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"❌ Vouch buffer flush error: {e}")
+
+        self._thread = threading.Thread(target=loop, name='vouch-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+        return self._thread
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': VOUCH_BUFFER_ENABLED,
+                'pending': len(self._pending),
+                'flush_ms': int(self.flush_interval * 1000),
+                'max_batch': self.max_batch,
+                **self._stats
+            }
+
+vouch_buffer = VouchBuffer(VOUCH_BUFFER_FLUSH_MS, VOUCH_BUFFER_MAX_BATCH)
+
+def buffered_vouch_error(user_id, issue_id):
+    """
+    404 message if the issue or user does not exist, checked before a vouch is buffered
+    (vouch_issues_batch() would silently skip it after the client already got 202).
+    The ranking index and the identity index answer most checks without a query.
+    """
+    if vouch_ranking.count(issue_id) is None:
+        result = supabase.table('issues').select('id').eq('id', issue_id).limit(1).execute()
+        if not result.data:
+            return 'Issue not found'
+    if find_user('id', user_id) is None:
+        return 'User not found'
+    return None
+
+@app.route('/api/issues/top', methods=['GET'])
+def get_top_issues():
+    """
+    Most vouched issues, served from the in-memory ranking index.
+
+    ?k=N (default 10, max 100), optional ?category= and ?status= filters.
+    """
+    log_api_access('/api/issues/top', 'GET', request.remote_addr)
+    
+    try:
+        k = int(request.args.get('k', 10))
+        if k < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'k must be a positive integer'}), 400
+    k = min(k, TOP_ISSUES_MAX_K)
+    category = request.args.get('category') or None
+    status = request.args.get('status') or None
+    
+    try:
+        # With Supabase the refresher thread keeps the index current; requests never scan the table
+        if not supabase and vouch_ranking.is_stale():
+            load_vouch_ranking()
+        top_issues = vouch_ranking.top(k, category=category, status=status)
+        response_data = {
+            'issues': top_issues,
+            'count': len(top_issues),
+            'k': k,
+            'category': category,
+            'status': status,
+            'index_ready': vouch_ranking.is_loaded(),
+            'source': 'ranking_index'
+        }
+        log_response(response_data, 200)
+        return jsonify(response_data)
+    
+    except Exception as e:
+        print(f"❌ Error fetching top issues: {e}")
+        return jsonify({'error': str(e), 'issues': [], 'count': 0}), 500
+
+@app.route('/api/issues/<int:issue_id>/media', methods=['GET'])
+def get_issue_media(issue_id):
+    """Upload status and URLs of an issue's image/audio (media_status: none, pending, ready, failed)"""
+    log_api_access(f'/api/issues/{issue_id}/media', 'GET', request.remote_addr)
+    
+    in_flight = media_pipeline.status(issue_id)
+    if in_flight:
+        return jsonify({'issue_id': issue_id, 'media_status': 'pending', 'stage': in_flight})
+    
+    try:
+        if supabase:
+            result = supabase.table('issues').select('id,media_status,image_url,audio_url,image_filename,audio_filename').eq('id', issue_id).execute()
+            row = result.data[0] if result.data else None
+        else:
+            row = next((issue for issue in issues if issue.get('id') == issue_id), None)
+        if not row:
+            return jsonify({'error': 'Issue not found'}), 404
+        return jsonify({
+            'issue_id': issue_id,
+            'media_status': row.get('media_status') or 'none',
+            'image_url': row.get('image_url'),
+            'audio_url': row.get('audio_url'),
+            'image_filename': row.get('image_filename'),
+            'audio_filename': row.get('audio_filename')
+        })
+    except Exception as e:
+        print(f"Error getting media status: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/issues/<int:issue_id>/vouch', methods=['POST'])
 def vouch_issue(issue_id):
     """Increment vouch_priority of an issue by +1 and track user vouch"""
@@ -778,6 +2362,28 @@ def vouch_issue(issue_id):
         else:
             print("ℹ️ No authentication provided, anonymous vouch")
         
+        if supabase and VOUCH_BUFFER_ENABLED and user_id is not None:
+            missing = buffered_vouch_error(user_id, issue_id)
+            if missing:
+                error_response = {'error': missing}
+                log_response(error_response, 404)
+                return jsonify(error_response), 404
+            if not vouch_buffer.submit(user_id, issue_id):
+                error_response = {'error': 'User has already vouched for this issue', 'already_vouched': True}
+                log_response(error_response, 409)
+                return jsonify(error_response), 409
+            known_count = vouch_ranking.count(issue_id)
+            response_data = {
+                'message': 'Vouch accepted',
+                'issue_id': issue_id,
+                'vouch_count': known_count + vouch_buffer.pending_for(issue_id) if known_count is not None else None,
+                'user_vouched': True,
+                'user_id': user_id,
+                'queued': True,
+                'source': 'buffer'
+            }
+            return jsonify(response_data), 202
+        
         if supabase:
             # Use the enhanced database function to handle vouching with user tracking
             try:
@@ -791,6 +2397,10 @@ def vouch_issue(issue_id):
                 if result.data:
                     vouch_result = result.data
                     if vouch_result.get('success'):
+                        invalidate_issue_feeds(f'issue {issue_id} vouched')
+                        update_vouch_ranking(issue_id, vouch_result['vouch_count'])
+                        publish_vouch_count(issue_id, vouch_result['vouch_count'])
+                        user_vouch_index.add(vouch_result.get('user_id'), issue_id)
                         print(f"✓ Issue {issue_id} vouched successfully - count: {vouch_result['vouch_count']}, user: {vouch_result.get('user_id', 'anonymous')}")
                         response_data = {
                             'message': 'Issue vouched successfully',
@@ -804,6 +2414,8 @@ def vouch_issue(issue_id):
                         log_response(response_data, 200)
                         return jsonify(response_data), 200
                     else:
+                        if vouch_result.get('already_vouched'):
+                            user_vouch_index.add(user_id, issue_id)
                         error_msg = vouch_result.get('error', 'Vouch failed')
                         status_code = 409 if vouch_result.get('already_vouched') else (404 if 'not found' in error_msg.lower() else 500)
                         error_response = {
@@ -820,25 +2432,35 @@ def vouch_issue(issue_id):
             except Exception as db_error:
                 print(f"Database vouch function error: {db_error}")
                 # Fallback to simple vouch_priority increment (legacy support)
-                result = supabase.table('issues').select('vouch_priority').eq('id', issue_id).execute()
-                
-                if not result.data:
-                    return jsonify({'error': 'Issue not found'}), 404
-                
-                current_vouch = result.data[0].get('vouch_priority', 0)
-                new_vouch = current_vouch + 1
-                
-                # Try direct update (fallback)
-                update_result = supabase.table('issues').update({
-                    'vouch_priority': new_vouch
-                }).eq('id', issue_id).execute()
+                # Compare-and-swap on the value we read, so concurrent vouches cannot overwrite each other
+                update_result = None
+                for _ in range(5):
+                    result = supabase.table('issues').select('vouch_priority').eq('id', issue_id).execute()
+                    
+                    if not result.data:
+                        return jsonify({'error': 'Issue not found'}), 404
+                    
+                    current_vouch = result.data[0].get('vouch_priority') or 0
+                    new_vouch = current_vouch + 1
+                    
+                    update_query = supabase.table('issues').update({'vouch_priority': new_vouch}).eq('id', issue_id)
+                    if result.data[0].get('vouch_priority') is None:
+                        update_query = update_query.is_('vouch_priority', 'null')
+                    else:
+                        update_query = update_query.eq('vouch_priority', current_vouch)
+                    update_result = update_query.execute()
+                    if update_result.data:
+                        break
+                    time.sleep(random.uniform(0.005, 0.05))
                 
-                if update_result.data:
+                if update_result and update_result.data:
+                    # No vouches row is written here, so this is not a vouch_count: the ranking and
+                    # SSE stay on the view's count, which reconcile_vouch_counts() would restore anyway
+                    invalidate_issue_feeds(f'issue {issue_id} vouched (legacy)')
                     print(f"✓ Issue {issue_id} vouch_priority updated to {new_vouch} (legacy fallback)")
                     response_data = {
                         'message': 'Issue vouched successfully (legacy mode)',
                         'issue_id': issue_id,
-                        'vouch_count': new_vouch,
                         'vouch_priority': new_vouch,
                         'user_vouched': False,
                         'source': 'database',
@@ -856,6 +2478,9 @@ def vouch_issue(issue_id):
             if issue.get('id') == issue_id:
                 current_vouch = issue.get('vouch_priority', 0)
                 issue['vouch_priority'] = current_vouch + 1
+                invalidate_issue_feeds(f'issue {issue_id} vouched (memory)')
+                vouch_ranking.set_count(issue_id, issue['vouch_priority'])
+                publish_vouch_count(issue_id, issue['vouch_priority'])
                 print(f"✓ Issue {issue_id} vouch_priority updated to {issue['vouch_priority']} (memory)")
                 return jsonify({
                     'message': 'Issue vouched successfully',
@@ -887,6 +2512,24 @@ def get_vouch_details(issue_id):
                 user_id = auth_data['user_id']
         
         if supabase:
+            # Fast path: counter column for the count, cached per-user vouched set for the flag
+            try:
+                issue_result = supabase.table('issue_vouch_counts').select('id,title,vouch_count').eq('id', issue_id).execute()
+                if not issue_result.data:
+                    return jsonify({'error': 'Issue not found'}), 404
+                row = issue_result.data[0]
+                return jsonify({
+                    'issue_id': row['id'],
+                    'title': row['title'],
+                    'vouch_count': row['vouch_count'],
+                    'vouch_priority': row['vouch_count'],
+                    'user_vouched': user_vouch_index.has_vouched(user_id, issue_id),
+                    'user_id': user_id,
+                    'source': 'database'
+                })
+            except Exception as view_error:
+                print(f"⚠️ Vouch fast path unavailable, using check_user_vouch: {view_error}")
+            
             try:
                 # Use the check_user_vouch function to get detailed vouch information
                 params = {
@@ -961,10 +2604,87 @@ def get_vouch_details(issue_id):
                     'source': 'memory'
                 })
         
-        return jsonify({'error': 'Issue not found'}), 404
+        return jsonify({'error': 'Issue not found'}), 404
+        
+    except Exception as e:
+        print(f"Error getting vouch count: {e}")
+        return jsonify({'error': str(e)}), 500
+
+MAX_VOUCH_STATUS_IDS = 200
+
+@app.route('/api/issues/vouch-status', methods=['POST'])
+def get_vouch_statuses():
+    """
+    Vouch count and user vouch status for many issues in one call.
+
+    Body: {"issue_ids": [1, 2, 3]} (at most 200). Replaces one GET /api/issues/<id>/vouch
+    per card: one IN query for the counts plus the cached per-user vouched set.
+    """
+    log_api_access('/api/issues/vouch-status', 'POST', request.remote_addr)
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object with issue_ids'}), 400
+    raw_ids = data.get('issue_ids')
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({'error': 'issue_ids must be a non-empty list'}), 400
+    if len(raw_ids) > MAX_VOUCH_STATUS_IDS:
+        return jsonify({'error': f'At most {MAX_VOUCH_STATUS_IDS} issue_ids per request'}), 400
+    try:
+        issue_ids = list(dict.fromkeys(int(i) for i in raw_ids))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'issue_ids must be integers'}), 400
+    
+    try:
+        user_id = None
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            auth_data = verify_auth_token(auth_header.split(' ')[1])
+            if auth_data:
+                user_id = auth_data['user_id']
+        
+        if supabase:
+            try:
+                result = supabase.table('issue_vouch_counts').select('id,title,vouch_count').in_('id', issue_ids).execute()
+                counts = {row['id']: row for row in result.data or []}
+            except Exception as view_error:
+                print(f"⚠️ issue_vouch_counts view not available: {view_error}")
+                result = supabase.table('issues').select('id,title,vouch_priority').in_('id', issue_ids).execute()
+                counts = {row['id']: {**row, 'vouch_count': row.get('vouch_priority', 0)} for row in result.data or []}
+            
+            vouched = user_vouch_index.vouched_ids(user_id) if user_id is not None else set()
+            source = 'database'
+        else:
+            counts = {issue['id']: {**issue, 'vouch_count': issue.get('vouch_priority', 0)} for issue in issues if issue.get('id') in issue_ids}
+            vouched = set()
+            source = 'memory'
+        
+        statuses = []
+        for issue_id in issue_ids:
+            row = counts.get(issue_id)
+            if row is None:
+                continue
+            vouch_count = row.get('vouch_count') or 0
+            statuses.append({
+                'issue_id': issue_id,
+                'title': row.get('title'),
+                'vouch_count': vouch_count,
+                'vouch_priority': vouch_count,
+                'user_vouched': UserVouchIndex._contains(vouched, issue_id)
+            })
         
+        response_data = {
+            'statuses': statuses,
+            'count': len(statuses),
+            'not_found': [i for i in issue_ids if i not in counts],
+            'user_id': user_id,
+            'source': source
+        }
+        log_response(response_data, 200)
+        return jsonify(response_data)
+    
     except Exception as e:
-        print(f"Error getting vouch count: {e}")
+        print(f"Error getting vouch statuses: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/user/vouches', methods=['GET'])
@@ -1027,6 +2747,69 @@ def get_user_vouches():
         print(f"Error getting user vouches: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/debug/cache-stats', methods=['GET'])
+def debug_cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    return jsonify({
+        'feed_cache': feed_cache.stats(),
+        'compressed_body_cache': compressed_body_cache.stats(),
+        'vouch_ranking': vouch_ranking.stats(),
+        'user_vouch_index': user_vouch_index.stats(),
+        'vouch_buffer': vouch_buffer.stats(),
+        'event_hub': event_hub.stats(),
+        'auth_token_cache': auth_token_cache.stats(),
+        'user_identity_index': user_identity_index.stats(),
+        'otp_store': otp_store.stats(),
+        'otp_delivery': otp_delivery.stats(),
+        'civic_id_allocator': civic_id_allocator.stats(),
+        'media_pipeline': media_pipeline.stats(),
+        'image_variants': {'enabled': image_variants_enabled(), 'format': IMAGE_VARIANT_FORMAT, **image_variant_stats}
+    })
+
+# Vouch count reconciliation: repairs drift between issues.vouch_count and the vouches table
+# (see vouch_counts_materialized.sql); vouch_priority is left as is
+VOUCH_RECONCILE_INTERVAL_SECONDS = int(os.getenv('VOUCH_RECONCILE_INTERVAL_SECONDS', '3600'))
+vouch_reconcile_status = {'last_run_at': None, 'repaired': None, 'error': None}
+
+def reconcile_vouch_counts():
+    """Run the reconcile_vouch_counts() RPC once and return the number of issues repaired"""
+    try:
+        result = supabase.rpc('reconcile_vouch_counts', {}).execute()
+        repaired = result.data or 0
+        vouch_reconcile_status.update({'last_run_at': datetime.now().isoformat(), 'repaired': repaired, 'error': None})
+        if repaired:
+            print(f"🔧 Vouch count reconciliation repaired {repaired} issue(s)")
+            invalidate_issue_feeds('vouch counts reconciled')
+            load_vouch_ranking()
+        return repaired
+    except Exception as e:
+        vouch_reconcile_status.update({'last_run_at': datetime.now().isoformat(), 'error': str(e)})
+        print(f"⚠️ Vouch count reconciliation failed: {e}")
+        return None
+
+def start_vouch_reconciler():
+    """Run reconcile_vouch_counts() periodically on a daemon thread"""
+    if not supabase or VOUCH_RECONCILE_INTERVAL_SECONDS <= 0:
+        return None
+    
+    def loop():
+        while True:
+            time.sleep(VOUCH_RECONCILE_INTERVAL_SECONDS)
+            reconcile_vouch_counts()
+    
+    thread = threading.Thread(target=loop, name='vouch-reconciler', daemon=True)
+    thread.start()
+    return thread
+
+@app.route('/api/debug/vouch-reconcile', methods=['GET'])
+def debug_vouch_reconcile():
+    """Last reconciliation result. Runs are left to the background reconciler, since each
+    one is a full-table UPDATE; run SELECT reconcile_vouch_counts(); in SQL to force one."""
+    return jsonify({
+        'interval_seconds': VOUCH_RECONCILE_INTERVAL_SECONDS,
+        **vouch_reconcile_status
+    })
+
 # Test endpoint to debug vouch counts using vouch_priority
 @app.route('/api/test-vouch-counts', methods=['GET'])
 def test_vouch_counts():
@@ -1066,19 +2849,352 @@ issues = []
 JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 
-# OTP storage (in production, use Redis or database with TTL)
-otp_store = {}
+# OTP storage: in-process (single worker) or a shared SQLite file in WAL mode (multiple workers)
+OTP_STORE = os.getenv('OTP_STORE', 'memory').lower()
+OTP_SQLITE_PATH = os.getenv('OTP_SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'otp_store.sqlite3'))
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', '300'))
+OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', '5'))
+OTP_SWEEP_INTERVAL_SECONDS = int(os.getenv('OTP_SWEEP_INTERVAL_SECONDS', '60'))
+
+class OTPStore(ABC):
+    """
+    Pending OTPs keyed by "<mobile>_<type>", with a TTL and a failed-attempt counter.
+
+    check() is the only way to read a code: it compares, counts the attempt and consumes the
+    entry on success as one atomic step, so a code can be used once even across workers.
+    put_if_absent() likewise keeps a code that is still valid instead of replacing it, so a
+    number gets one code (and one SMS) per flow while it lasts, whichever worker is asked.
+    """
+
+    # check() outcomes
+    OK = 'ok'
+    MISSING = 'missing'
+    EXPIRED = 'expired'
+    INVALID = 'invalid'
+    LOCKED = 'locked'
+
+    @staticmethod
+    def _matches(expected, otp):
+        """Constant-time comparison on UTF-8 bytes (compare_digest rejects non-ASCII str)"""
+        return hmac.compare_digest(str(expected).encode('utf-8'), str(otp).encode('utf-8'))
+
+    @abstractmethod
+    def put_if_absent(self, key, otp, data, ttl_seconds):
+        """
+        Store a new code for key unless a valid one is pending. Returns None if stored, else
+        the seconds the pending code has left. Expired or locked codes are replaced.
+        """
+
+    @abstractmethod
+    def discard(self, key, otp):
+        """Delete the pending code for key if it is still otp (e.g. its SMS could not be sent)"""
+
+    @abstractmethod
+    def check(self, key, otp):
+        """Return (outcome, data); data is only returned for OK"""
+
+    @abstractmethod
+    def sweep(self):
+        """Delete expired entries, returning how many were removed"""
+
+    @abstractmethod
+    def stats(self):
+        """Backend name and entry counts for /api/debug/cache-stats"""
+
+    def start_sweeper(self, interval_seconds):
+        def loop():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"⚠️ OTP sweep failed: {e}")
+
+        thread = threading.Thread(target=loop, name='otp-sweeper', daemon=True)
+        thread.start()
+        return thread
+
+class MemoryOTPStore(OTPStore):
+    """Dict of entries plus a min-heap of expiry times; sweep() pops only what has expired"""
+
+    def __init__(self, max_attempts):
+        self.max_attempts = max_attempts
+        self._entries = {}   # key -> [expires_at, otp, data, attempts]
+        self._expiry = []    # heap of (expires_at, key); stale items are skipped when popped
+        self._lock = threading.Lock()
+        self.swept = 0
+        self.suppressed = 0
+
+    def put_if_absent(self, key, otp, data, ttl_seconds):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[3] < self.max_attempts:
+                self.suppressed += 1
+                return max(1, math.ceil(entry[0] - now))
+            expires_at = now + ttl_seconds
+            self._entries[key] = [expires_at, otp, data, 0]
+            heapq.heappush(self._expiry, (expires_at, key))
+            return None
+
+    def discard(self, key, otp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == otp:
+                del self._entries[key]
+
+    def check(self, key, otp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self.MISSING, None
+            expires_at, expected, data, attempts = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return self.EXPIRED, None
+            if attempts >= self.max_attempts:
+                return self.LOCKED, None
+            if not self._matches(expected, otp):
+                entry[3] += 1
+                return (self.LOCKED if entry[3] >= self.max_attempts else self.INVALID), None
+            del self._entries[key]
+            return self.OK, data
+
+    def sweep(self):
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiry)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == expires_at:
+                    del self._entries[key]
+                    removed += 1
+            self.swept += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'pending': len(self._entries), 'heap_size': len(self._expiry), 'swept': self.swept, 'suppressed': self.suppressed}
+
+class SQLiteOTPStore(OTPStore):
+    """OTPs in a local SQLite file (WAL mode), shared by every worker process on the host"""
+
+    def __init__(self, path, max_attempts):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self.swept = 0
+        self.suppressed = 0
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS otp_codes (
+                    key TEXT PRIMARY KEY,
+                    otp TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_otp_codes_expires_at ON otp_codes(expires_at)')
+
+    def _connect(self):
+        """One connection per thread; sqlite3 connections must not be shared across threads"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put_if_absent(self, key, otp, data, ttl_seconds):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute('SELECT expires_at, attempts FROM otp_codes WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[0] > now and row[1] < self.max_attempts:
+                conn.execute('COMMIT')
+                self.suppressed += 1
+                return max(1, math.ceil(row[0] - now))
+            conn.execute(
+                'INSERT OR REPLACE INTO otp_codes (key, otp, data, expires_at, attempts) VALUES (?, ?, ?, ?, 0)',
+                (key, otp, json.dumps(data), now + ttl_seconds)
+            )
+            conn.execute('COMMIT')
+            return None
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def discard(self, key, otp):
+        self._connect().execute('DELETE FROM otp_codes WHERE key = ? AND otp = ?', (key, otp))
+
+    def check(self, key, otp):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT otp, data, expires_at, attempts FROM otp_codes WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                outcome, data = self.MISSING, None
+            else:
+                expected, data_json, expires_at, attempts = row
+                data = None
+                if expires_at <= time.time():
+                    conn.execute('DELETE FROM otp_codes WHERE key = ?', (key,))
+                    outcome = self.EXPIRED
+                elif attempts >= self.max_attempts:
+                    outcome = self.LOCKED
+                elif not self._matches(expected, otp):
+                    conn.execute('UPDATE otp_codes SET attempts = attempts + 1 WHERE key = ?', (key,))
+                    outcome = self.LOCKED if attempts + 1 >= self.max_attempts else self.INVALID
+                else:
+                    conn.execute('DELETE FROM otp_codes WHERE key = ?', (key,))
+                    outcome, data = self.OK, json.loads(data_json)
+            conn.execute('COMMIT')
+            return outcome, data
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def sweep(self):
+        removed = self._connect().execute('DELETE FROM otp_codes WHERE expires_at <= ?', (time.time(),)).rowcount
+        self.swept += removed
+        return removed
+
+    def stats(self):
+        pending = self._connect().execute('SELECT COUNT(*) FROM otp_codes').fetchone()[0]
+        return {'backend': 'sqlite', 'path': self.path, 'pending': pending, 'swept': self.swept, 'suppressed': self.suppressed}
+
+def create_otp_store():
+    if OTP_STORE == 'sqlite':
+        try:
+            store = SQLiteOTPStore(OTP_SQLITE_PATH, OTP_MAX_ATTEMPTS)
+            print(f"✓ OTP store: SQLite ({OTP_SQLITE_PATH})")
+            return store
+        except Exception as e:
+            print(f"⚠️ Could not open SQLite OTP store, using memory: {e}")
+    elif OTP_STORE != 'memory':
+        print(f"⚠️ Unknown OTP_STORE '{OTP_STORE}', using memory")
+    return MemoryOTPStore(OTP_MAX_ATTEMPTS)
+
+otp_store = create_otp_store()
+otp_store.start_sweeper(OTP_SWEEP_INTERVAL_SECONDS)
 
 def generate_otp():
     """Generate a 6-digit OTP"""
     return ''.join(random.choices(string.digits, k=6))
 
-def generate_civic_id():
-    """Generate a unique civic ID"""
+def generate_random_civic_id():
+    """Random 6-digit civic ID (used when the block allocator is unavailable)"""
     prefix = 'CIV'
     random_num = random.randint(100000, 999999)
     return f"{prefix}{random_num}"
 
+# Civic ID blocks reserved from civic_id_block_seq (see civic_id_sequence.sql)
+CIVIC_ID_SPACE = 9000000
+CIVIC_ID_OFFSET = 1000000
+CIVIC_ID_MULTIPLIER = 7368787  # coprime with CIVIC_ID_SPACE, so n -> n * M mod SPACE is a bijection
+CIVIC_ID_RETRY_SECONDS = 60
+
+class CivicIdAllocator:
+    """
+    Hands out civic IDs from blocks reserved with one reserve_civic_id_block() RPC each.
+
+    Sequence values are scrambled into 7-digit numbers so IDs do not reveal registration order.
+    The next block is fetched in the background once the current one is 80% used, so
+    registrations normally never wait on the database. If the RPC is missing or failing,
+    random IDs are issued and the RPC is retried after CIVIC_ID_RETRY_SECONDS.
+    """
+
+    def __init__(self):
+        self._blocks = deque()        # [next, end) ranges of sequence values
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._block_size = 0
+        self._unavailable_until = 0
+        self.reserved_blocks = 0
+        self.random_fallbacks = 0
+
+    @staticmethod
+    def format(sequence_value):
+        number = CIVIC_ID_OFFSET + (sequence_value * CIVIC_ID_MULTIPLIER) % CIVIC_ID_SPACE
+        return f"CIV{number}"
+
+    def _reserve_block(self):
+        result = supabase.rpc('reserve_civic_id_block', {}).execute()
+        start, size = int(result.data['start']), int(result.data['size'])
+        with self._lock:
+            self._blocks.append([start, start + size])
+            self._block_size = size
+            self.reserved_blocks += 1
+
+    def _refill(self):
+        try:
+            self._reserve_block()
+        except Exception as e:
+            print(f"⚠️ Could not reserve a civic ID block: {e}")
+            self._unavailable_until = time.monotonic() + CIVIC_ID_RETRY_SECONDS
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _remaining(self):
+        return sum(end - start for start, end in self._blocks)
+
+    def _take(self):
+        """Next sequence value from the reserved blocks, or None when they are used up"""
+        while self._blocks:
+            block = self._blocks[0]
+            if block[0] < block[1]:
+                value = block[0]
+                block[0] += 1
+                return value
+            self._blocks.popleft()
+        return None
+
+    def next(self):
+        if not supabase or time.monotonic() < self._unavailable_until:
+            self.random_fallbacks += 1
+            return generate_random_civic_id()
+
+        with self._lock:
+            value = self._take()
+            prefetch = not self._refilling and self._block_size and self._remaining() * 5 <= self._block_size
+            if prefetch:
+                self._refilling = True
+        if prefetch:
+            threading.Thread(target=self._refill, name='civic-id-refill', daemon=True).start()
+        if value is not None:
+            return self.format(value)
+
+        # Nothing reserved yet (first call, or prefetch fell behind): reserve inline
+        try:
+            self._reserve_block()
+        except Exception as e:
+            print(f"⚠️ Could not reserve a civic ID block, using a random ID: {e}")
+            self._unavailable_until = time.monotonic() + CIVIC_ID_RETRY_SECONDS
+            self.random_fallbacks += 1
+            return generate_random_civic_id()
+        with self._lock:
+            value = self._take()
+        return self.format(value) if value is not None else generate_random_civic_id()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'remaining_in_blocks': self._remaining(),
+                'reserved_blocks': self.reserved_blocks,
+                'random_fallbacks': self.random_fallbacks
+            }
+
+civic_id_allocator = CivicIdAllocator()
+
+def generate_civic_id():
+    """Generate a unique civic ID"""
+    return civic_id_allocator.next()
+
 def normalize_phone_number(phone_number):
     """
     Convert Firebase phone number format to database format
@@ -1109,7 +3225,74 @@ def generate_jwt_token(user_data):
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def upload_to_supabase_storage(file_data, filename, bucket_name='Civic-Image-Bucket'):
+# Streaming storage uploads: the request body is sent in fixed-size chunks straight from the
+# (werkzeug-spooled) upload stream, so per-upload memory stays at one chunk
+STORAGE_UPLOAD_CHUNK_SIZE = int(os.getenv('STORAGE_UPLOAD_CHUNK_SIZE', str(256 * 1024)))
+STORAGE_UPLOAD_TIMEOUT_SECONDS = float(os.getenv('STORAGE_UPLOAD_TIMEOUT_SECONDS', '120'))
+DEFAULT_CONTENT_TYPES = {'Civic-Image-Bucket': 'image/jpeg', 'Civic-Audio-Bucket': 'audio/webm'}
+
+_storage_http_client = None
+_storage_http_lock = threading.Lock()
+
+def storage_http_client():
+    """Shared httpx client so uploads reuse connections to the storage API"""
+    global _storage_http_client
+    with _storage_http_lock:
+        if _storage_http_client is None:
+            _storage_http_client = httpx.Client(timeout=httpx.Timeout(STORAGE_UPLOAD_TIMEOUT_SECONDS, connect=10))
+        return _storage_http_client
+
+def stream_size(stream):
+    """Bytes left in a seekable stream, or None if it cannot seek"""
+    try:
+        position = stream.tell()
+        end = stream.seek(0, os.SEEK_END)
+        stream.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+def stream_to_supabase_storage(stream, object_path, bucket_name, content_type):
+    """
+    POST a file-like object to the Storage REST API chunk by chunk.
+
+    The SHA-256 and byte count are computed as chunks go out. Returns the same dict shape as
+    upload_to_supabase_storage(), plus 'sha256' and 'size'.
+    """
+    digest = hashlib.sha256()
+    sent = 0
+
+    def chunks():
+        nonlocal sent
+        while True:
+            chunk = stream.read(STORAGE_UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            digest.update(chunk)
+            sent += len(chunk)
+            yield chunk
+
+    headers = {
+        'Authorization': f'Bearer {supabase_key}',
+        'apikey': supabase_key,
+        'Content-Type': content_type,
+        'cache-control': 'max-age=3600',
+        'x-upsert': 'false'
+    }
+    size = stream_size(stream)
+    if size is not None:
+        headers['Content-Length'] = str(size)  # otherwise httpx falls back to chunked transfer encoding
+
+    url = f"{supabase_url.rstrip('/')}/storage/v1/object/{bucket_name}/{object_path}"
+    response = storage_http_client().post(url, content=chunks(), headers=headers)
+    if response.status_code >= 300:
+        return {'success': False, 'error': f'Storage upload failed ({response.status_code}): {response.text[:200]}'}
+
+    public_url = supabase.storage.from_(bucket_name).get_public_url(object_path)
+    print(f"✓ File streamed to storage: {public_url} ({sent} bytes, sha256 {digest.hexdigest()[:12]}…)")
+    return {'success': True, 'url': public_url, 'filename': object_path, 'sha256': digest.hexdigest(), 'size': sent}
+
+def upload_to_supabase_storage(file_data, filename, bucket_name='Civic-Image-Bucket', content_type=None):
     """
     Upload file to Supabase Storage and return the public URL
     
@@ -1117,6 +3300,7 @@ def upload_to_supabase_storage(file_data, filename, bucket_name='Civic-Image-Buc
         file_data: Binary file data or file-like object
         filename: Name for the file in storage
         bucket_name: Supabase storage bucket name
+        content_type: MIME type to store (defaults to the upload's own, then the bucket's usual type)
     
     Returns:
         dict: {'success': True, 'url': 'public_url'} or {'success': False, 'error': 'message'}
@@ -1136,11 +3320,11 @@ def upload_to_supabase_storage(file_data, filename, bucket_name='Civic-Image-Buc
         else:
             folder_path = unique_filename  # Fallback for other buckets
         
-        # Convert file_data to bytes if it's a file-like object
+        # File-like objects (uploads) are streamed; only raw bytes go through the SDK in one piece
         if hasattr(file_data, 'read'):
-            file_bytes = file_data.read()
-        else:
-            file_bytes = file_data
+            content_type = content_type or getattr(file_data, 'mimetype', None) or DEFAULT_CONTENT_TYPES.get(bucket_name, 'application/octet-stream')
+            return stream_to_supabase_storage(file_data, folder_path, bucket_name, content_type)
+        file_bytes = file_data
             
         # Upload to Supabase Storage with folder organization
         response = supabase.storage.from_(bucket_name).upload(
@@ -1161,6 +3345,405 @@ def upload_to_supabase_storage(file_data, filename, bucket_name='Civic-Image-Buc
         print(f"✗ Error uploading to Supabase Storage: {e}")
         return {'success': False, 'error': str(e)}
 
+# Background media pipeline: create_issue() spools uploads to disk, inserts the row with
+# media_status 'pending' and returns; workers upload the files and patch the row (media_pipeline.sql)
+MEDIA_PIPELINE_ENABLED = os.getenv('MEDIA_PIPELINE_ENABLED', 'false').lower() == 'true'
+MEDIA_UPLOAD_WORKERS = int(os.getenv('MEDIA_UPLOAD_WORKERS', '4'))
+MEDIA_UPLOAD_RETRIES = int(os.getenv('MEDIA_UPLOAD_RETRIES', '2'))
+MEDIA_REQUEST_UPLOAD_WORKERS = int(os.getenv('MEDIA_REQUEST_UPLOAD_WORKERS', '8'))
+MEDIA_SPOOL_FOLDER = os.path.join(UPLOAD_FOLDER, 'spool')
+
+# Background uploads (pipeline jobs with their retry backoff, image derivatives)
+media_upload_executor = ThreadPoolExecutor(max_workers=MEDIA_UPLOAD_WORKERS, thread_name_prefix='media-upload')
+# Uploads a request is waiting on get their own pool, so a burst of background work never queues them.
+# Tasks on either pool never wait on other tasks on the same pool, so neither can deadlock.
+request_upload_executor = ThreadPoolExecutor(max_workers=MEDIA_REQUEST_UPLOAD_WORKERS, thread_name_prefix='request-upload')
+
+MEDIA_KINDS = {
+    'image': {'bucket': 'Civic-Image-Bucket', 'suffix': 'issue_image.jpg'},
+    'audio': {'bucket': 'Civic-Audio-Bucket', 'suffix': 'issue_audio.webm'},
+}
+
+class MediaPipeline:
+    """
+    Uploads spooled media for newly created issues on a worker pool.
+
+    Each job has a JSON manifest next to its spooled files, so jobs interrupted by a restart are
+    picked up again by recover(). A file that still fails after MEDIA_UPLOAD_RETRIES is kept in
+    the uploads folder (the old local fallback) and the issue is marked media_status 'failed'.
+    """
+
+    def __init__(self, executor, spool_folder):
+        self.spool_folder = spool_folder
+        self._executor = executor
+        self._active = {}   # issue_id -> 'pending' | 'uploading'
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'ready': 0, 'failed': 0, 'retries': 0, 'recovered': 0}
+        os.makedirs(spool_folder, exist_ok=True)
+
+    def spool(self, uploads, title):
+        """Write each FileStorage to the spool folder (chunked copy) and describe it for the job"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        spooled = []
+        for kind, file_storage in uploads.items():
+            filename = secure_filename(f"{title}_{timestamp}_{MEDIA_KINDS[kind]['suffix']}")
+            path = os.path.join(self.spool_folder, f"{uuid.uuid4().hex}_{filename}")
+            file_storage.save(path)
+            spooled.append({
+                'kind': kind,
+                'path': path,
+                'filename': filename,
+                'content_type': file_storage.mimetype or DEFAULT_CONTENT_TYPES[MEDIA_KINDS[kind]['bucket']]
+            })
+        return spooled
+
+    def _manifest_path(self, issue_id):
+        return os.path.join(self.spool_folder, f"issue_{issue_id}.json")
+
+    def _write_manifest(self, job):
+        """Replace the job's manifest atomically, so a crash never leaves half a file behind"""
+        path = self._manifest_path(job['issue_id'])
+        with open(path + '.tmp', 'w') as manifest:
+            json.dump(job, manifest)
+        os.replace(path + '.tmp', path)
+
+    def submit(self, issue_id, spooled, target):
+        """Queue the upload job; target is 'database' or 'memory' (where the row lives)"""
+        job = {'issue_id': issue_id, 'target': target, 'files': spooled}
+        self._write_manifest(job)
+        with self._lock:
+            self._active[issue_id] = 'pending'
+            self._stats['submitted'] += 1
+        self._start(job)
+
+    def status(self, issue_id):
+        with self._lock:
+            return self._active.get(issue_id)
+
+    def _upload(self, media):
+        """Upload one spooled file, retrying with backoff. Returns (issue fields, uploaded)."""
+        bucket = MEDIA_KINDS[media['kind']]['bucket']
+        error = None
+        for attempt in range(MEDIA_UPLOAD_RETRIES + 1):
+            if attempt:
+                with self._lock:
+                    self._stats['retries'] += 1
+                time.sleep(2 ** (attempt - 1))
+            with open(media['path'], 'rb') as spooled_file:
+                result = upload_to_supabase_storage(spooled_file, media['filename'], bucket,
+                                                    content_type=media.get('content_type'))
+            if result['success']:
+                return {f"{media['kind']}_url": result['url'], f"{media['kind']}_filename": result['filename']}, True
+            error = result['error']
+
+        print(f"✗ Giving up on {media['kind']} upload ({error}), keeping it locally")
+        return {f"{media['kind']}_filename": media['filename']}, False
+
+    def _settle(self, job, media):
+        """
+        Dispose of a spooled file whose result is already in the manifest: hand an uploaded
+        image to the derivative builder, delete other uploads, move failures to the uploads
+        folder (the old local fallback). Safe to repeat after a restart.
+        """
+        if not os.path.exists(media['path']):
+            return
+        if not media['uploaded']:
+            os.replace(media['path'], os.path.join(UPLOAD_FOLDER, media['filename']))
+        elif media['kind'] == 'image' and image_variants_enabled():
+            # The spooled original doubles as the source for the image derivatives
+            schedule_image_variants(job['issue_id'], job['target'], media['path'])
+        else:
+            os.remove(media['path'])
+
+    def _start(self, job):
+        """
+        Upload a job's files concurrently; whichever upload finishes last records the result.
+
+        Files whose result is already in the manifest (a job recovered after a restart) are
+        not uploaded again.
+        """
+        state = {'job': job, 'remaining': len(job['files']), 'updates': {}, 'all_uploaded': True}
+        pending = []
+        for media in job['files']:
+            if 'result' in media:
+                self._settle(job, media)
+                state['updates'].update(media['result'])
+                state['all_uploaded'] = state['all_uploaded'] and media['uploaded']
+                state['remaining'] -= 1
+            else:
+                pending.append(media)
+        if not pending:
+            self._executor.submit(self._finish, state)
+            return
+        for media in pending:
+            self._executor.submit(self._run_file, state, media)
+
+    def _run_file(self, state, media):
+        job = state['job']
+        issue_id = job['issue_id']
+        with self._lock:
+            self._active[issue_id] = 'uploading'
+        try:
+            media_updates, uploaded = self._upload(media)
+            # Record the result before the spooled file goes away, so a crash cannot lose the URL
+            with self._lock:
+                media.update(result=media_updates, uploaded=uploaded)
+                self._write_manifest(job)
+            self._settle(job, media)
+        except Exception as e:
+            print(f"❌ {media['kind']} upload for issue {issue_id} failed: {e}")
+            media_updates, uploaded = media.get('result', {}), media.get('uploaded', False)
+        with self._lock:
+            state['updates'].update(media_updates)
+            state['all_uploaded'] = state['all_uploaded'] and uploaded
+            state['remaining'] -= 1
+            done = state['remaining'] == 0
+        if done:
+            self._finish(state)
+
+    def _finish(self, state):
+        job = state['job']
+        issue_id = job['issue_id']
+        updates = dict(state['updates'])
+        updates['media_status'] = 'ready' if state['all_uploaded'] else 'failed'
+
+        try:
+            patch_issue_media(issue_id, updates, job['target'])
+            os.remove(self._manifest_path(issue_id))
+        except Exception as e:
+            # The manifest stays behind, so recover() retries this job after a restart
+            print(f"❌ Could not record media for issue {issue_id}: {e}")
+        with self._lock:
+            self._active.pop(issue_id, None)
+            self._stats[updates['media_status']] += 1
+        print(f"✓ Media for issue {issue_id}: {updates['media_status']}")
+
+    def recover(self):
+        """
+        Resubmit database-backed jobs whose manifests survived a restart. Jobs for in-memory
+        issues died with the process that held the row, so their files are deleted instead.
+        """
+        for name in os.listdir(self.spool_folder):
+            if not (name.startswith('issue_') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.spool_folder, name)) as manifest:
+                    job = json.load(manifest)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping unreadable media manifest {name}: {e}")
+                continue
+            if job.get('target') != 'database':
+                remove_files([media['path'] for media in job.get('files', [])])
+                remove_files([os.path.join(self.spool_folder, name)])
+                print(f"🧹 Dropped media spool for in-memory issue {job.get('issue_id')}")
+                continue
+            for media in job['files']:
+                if 'result' not in media and not os.path.exists(media['path']):
+                    # Lost before its upload finished: nothing to retry, so the job cannot be 'ready'
+                    print(f"⚠️ Spooled {media['kind']} for issue {job['issue_id']} is missing")
+                    media.update(result={}, uploaded=False)
+            with self._lock:
+                self._active[job['issue_id']] = 'pending'
+                self._stats['recovered'] += 1
+            self._start(job)
+
+    def stats(self):
+        with self._lock:
+            return {'enabled': MEDIA_PIPELINE_ENABLED, 'in_flight': len(self._active), **self._stats}
+
+def patch_issue_media(issue_id, updates, target):
+    """Write media URLs/status onto the issue row, then tell feeds and stream clients"""
+    if target == 'database' and supabase:
+        supabase.table('issues').update(updates).eq('id', issue_id).execute()
+    else:
+        for issue in issues:
+            if issue.get('id') == issue_id:
+                issue.update(updates)
+                break
+    invalidate_issue_feeds(f'issue {issue_id} media updated')
+    event_hub.publish('media_ready', {'id': issue_id, **{field: updates[field] for field in MEDIA_EVENT_FIELDS if field in updates}})
+
+MEDIA_EVENT_FIELDS = ('media_status', 'image_url', 'audio_url', 'image_variants')
+
+media_pipeline = MediaPipeline(media_upload_executor, MEDIA_SPOOL_FOLDER)
+
+# Image derivatives: decoded and encoded in worker processes, uploaded next to the original,
+# and recorded in issues.image_variants (see image_variants.sql)
+IMAGE_VARIANTS_ENABLED = os.getenv('IMAGE_VARIANTS_ENABLED', 'false').lower() == 'true'
+IMAGE_VARIANT_FORMAT = supported_format(os.getenv('IMAGE_VARIANT_FORMAT', 'webp'))
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', '80'))
+IMAGE_VARIANT_PROCESSES = int(os.getenv('IMAGE_VARIANT_PROCESSES', str(max(1, (os.cpu_count() or 2) // 2))))
+
+_image_process_pool = None
+_image_process_pool_lock = threading.Lock()
+image_variant_stats = {'rendered': 0, 'failed': 0}
+
+def image_variants_enabled():
+    return IMAGE_VARIANTS_ENABLED and PIL_AVAILABLE and supabase is not None
+
+IMAGE_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'image_worker.py')
+
+class ImageWorkerPool:
+    """
+    Long-lived image_worker.py processes, fed one job at a time over stdin/stdout pipes.
+
+    The workers import only image_variants, never this module, so they carry none of the
+    app's clients or threads. Each worker has a feeder thread that writes a job, waits for the
+    reply (a blocking pipe read, so the GIL is free for request threads) and resolves the job's
+    Future; a worker that dies or stops answering is replaced on the next job.
+    """
+
+    def __init__(self, processes):
+        self._jobs = queue.Queue()
+        for index in range(processes):
+            threading.Thread(target=self._feed, name=f'image-worker-{index}', daemon=True).start()
+
+    def submit(self, source_path, output_dir, image_format, quality):
+        future = Future()
+        self._jobs.put((future, {'source_path': source_path, 'output_dir': output_dir,
+                                 'format': image_format, 'quality': quality}))
+        return future
+
+    @staticmethod
+    def _spawn():
+        return subprocess.Popen([sys.executable, IMAGE_WORKER_SCRIPT], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, text=True, bufsize=1)
+
+    def _feed(self):
+        worker = None
+        while True:
+            future, job = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is None or worker.poll() is not None:
+                    worker = self._spawn()
+                worker.stdin.write(json.dumps(job) + '\n')
+                worker.stdin.flush()
+                line = worker.stdout.readline()
+                if not line:
+                    raise RuntimeError(f"image worker exited with status {worker.wait()}")
+                reply = json.loads(line)
+            except Exception as e:
+                if worker is not None:
+                    worker.kill()
+                    worker.wait()
+                    worker = None
+                future.set_exception(e)
+                continue
+            if 'error' in reply:
+                future.set_exception(RuntimeError(reply['error']))
+            else:
+                future.set_result(reply['variants'])
+
+def image_process_pool():
+    """Worker processes for decoding/encoding, so Pillow work never holds a request thread's GIL"""
+    global _image_process_pool
+    with _image_process_pool_lock:
+        if _image_process_pool is None:
+            _image_process_pool = ImageWorkerPool(IMAGE_VARIANT_PROCESSES)
+        return _image_process_pool
+
+def schedule_image_variants(issue_id, target, source_path):
+    """
+    Build, upload and record derivatives of a spooled original in the background, taking
+    ownership of source_path. No thread waits on the render: the worker pool's completion
+    callback queues the uploads.
+    """
+    render_image_variants(issue_id, source_path, target)
+
+def render_image_variants(issue_id, source_path, target):
+    try:
+        future = image_process_pool().submit(source_path, MEDIA_SPOOL_FOLDER, IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY)
+    except Exception as e:
+        image_variant_stats['failed'] += 1
+        print(f"⚠️ Could not queue image variants for issue {issue_id}: {e}")
+        remove_files([source_path])
+        return
+    future.add_done_callback(
+        lambda done: media_upload_executor.submit(store_image_variants, issue_id, source_path, target, done)
+    )
+
+def store_image_variants(issue_id, source_path, target, render_future):
+    """Upload rendered variants and patch the issue; render_future is already done"""
+    rendered = {}
+    try:
+        rendered = render_future.result()
+        variants = {}
+        for name, info in rendered.items():
+            with open(info['path'], 'rb') as variant_file:
+                result = upload_to_supabase_storage(variant_file, os.path.basename(info['path']),
+                                                    content_type=info['content_type'])
+            if not result['success']:
+                raise RuntimeError(f"{name}: {result['error']}")
+            variants[name] = {'url': result['url'], 'width': info['width'], 'height': info['height'], 'bytes': info['bytes']}
+        patch_issue_media(issue_id, {'image_variants': variants}, target)
+        image_variant_stats['rendered'] += 1
+        sizes = ', '.join(f"{name} {info['width']}x{info['height']}" for name, info in variants.items())
+        print(f"✓ Image variants for issue {issue_id}: {sizes}")
+    except Exception as e:
+        # Derivatives are optional: clients keep using image_url
+        image_variant_stats['failed'] += 1
+        print(f"⚠️ Could not build image variants for issue {issue_id}: {e}")
+    finally:
+        remove_files([source_path] + [info['path'] for info in rendered.values()])
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def upload_request_media(uploads, title, keep_image=False):
+    """
+    Upload a submission's files concurrently on the request pool and wait for all of them.
+
+    Each file keeps its own local-disk fallback, so one failed upload does not affect the other.
+    Returns the issue fields to set (<kind>_url / <kind>_filename) and, with keep_image, the path
+    of a spool-folder copy of the uploaded image for derivatives (None if it was not uploaded).
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    kept = {}
+
+    def upload_one(kind, file_storage):
+        filename = secure_filename(f"{title}_{timestamp}_{MEDIA_KINDS[kind]['suffix']}")
+        upload_result = upload_to_supabase_storage(file_storage, filename, MEDIA_KINDS[kind]['bucket'])
+        if upload_result['success']:
+            print(f"✓ {kind.capitalize()} uploaded to Supabase Storage: {upload_result['url']}")
+            if keep_image and kind == 'image':
+                # Copy from werkzeug's request spool rather than downloading the stored original later
+                path = os.path.join(MEDIA_SPOOL_FOLDER, f"{uuid.uuid4().hex}_{filename}")
+                try:
+                    file_storage.seek(0)
+                    file_storage.save(path)
+                    kept['image'] = path
+                except OSError as e:
+                    print(f"⚠️ Could not keep a copy of the image for derivatives: {e}")
+                    remove_files([path])
+            return {f'{kind}_url': upload_result['url'], f'{kind}_filename': upload_result['filename']}
+
+        print(f"✗ Failed to upload {kind} to Supabase Storage: {upload_result['error']}")
+        # Fallback to local storage for backwards compatibility
+        file_storage.seek(0)  # Reset file pointer
+        local_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        file_storage.save(local_path)
+        print(f"✓ {kind.capitalize()} saved locally as fallback: {local_path}")
+        return {f'{kind}_filename': filename}
+
+    futures = {kind: request_upload_executor.submit(upload_one, kind, file_storage) for kind, file_storage in uploads.items()}
+    fields = {}
+    errors = []
+    for kind, future in futures.items():
+        try:
+            fields.update(future.result())
+        except Exception as e:
+            errors.append(f"{kind}: {e}")
+    if errors:
+        # Only reached when the local fallback failed too; the issue is still created without that file
+        print(f"❌ Media could not be stored ({'; '.join(errors)})")
+    return fields, kept.get('image')
+
 def verify_jwt_token(token):
     """Verify JWT token"""
     try:
@@ -1188,16 +3771,151 @@ def verify_firebase_token(id_token):
             'success': True,
             'phone_number': phone_number,
             'uid': uid,
+            'exp': decoded_token.get('exp'),
             'firebase_user': True
         }
 
     except auth.ExpiredIdTokenError:
-        return {'success': False, 'error': 'Token expired'}
+        return {'success': False, 'error': 'Token expired', 'invalid': True}
     except auth.InvalidIdTokenError:
-        return {'success': False, 'error': 'Invalid token'}
+        return {'success': False, 'error': 'Invalid token', 'invalid': True}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
+# In-memory identity index over the users table: id, firebase_uid, mobile_number, civic_id -> user row
+USER_INDEX_PRELOAD = os.getenv('USER_INDEX_PRELOAD', 'true').lower() == 'true'
+USER_INDEX_TTL_SECONDS = float(os.getenv('USER_INDEX_TTL_SECONDS', '300'))
+USER_INDEX_PAGE_SIZE = 1000
+
+class UserIdentityIndex:
+    """
+    Resolves users by any identity key without a users-table query.
+
+    Rows are preloaded in bulk at startup and written through by every endpoint that inserts or
+    updates a user in this process. A miss is not proof of absence (another worker may have
+    created the user), so lookups fall back to the database and index what they find. Rows
+    expire after ttl_seconds, which bounds how long updates or deletions made through other
+    workers go unseen.
+    """
+
+    KEYS = ('id', 'firebase_uid', 'mobile_number', 'civic_id')
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._by_key = {key: {} for key in self.KEYS}
+        self._expires = {}  # str(id) -> monotonic deadline
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def _drop(self, row):
+        for key in self.KEYS:
+            value = row.get(key)
+            if value not in (None, '') and self._by_key[key].get(str(value)) is row:
+                del self._by_key[key][str(value)]
+        self._expires.pop(str(row['id']), None)
+
+    def put(self, user):
+        """Index (or re-index) a user row, dropping keys that changed since it was last seen"""
+        if not user or user.get('id') is None:
+            return
+        row = dict(user)
+        with self._lock:
+            previous = self._by_key['id'].get(str(row['id']))
+            if previous:
+                self._drop(previous)
+            for key in self.KEYS:
+                value = row.get(key)
+                if value not in (None, ''):
+                    self._by_key[key][str(value)] = row
+            self._expires[str(row['id'])] = time.monotonic() + self.ttl_seconds
+
+    def get(self, key, value):
+        if value in (None, ''):
+            return None
+        with self._lock:
+            row = self._by_key[key].get(str(value))
+            if row is not None and self._expires.get(str(row['id']), 0) <= time.monotonic():
+                self._drop(row)
+                self.expirations += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(row)
+
+    def discard(self, key, value):
+        """Forget the user indexed under key=value (e.g. it no longer exists in the database)"""
+        if value in (None, ''):
+            return
+        with self._lock:
+            row = self._by_key[key].get(str(value))
+            if row is not None:
+                self._drop(row)
+
+    def preload(self):
+        """Bulk-load every user in id order, one page per query"""
+        count = 0
+        last_id = None
+        while True:
+            query = supabase.table('users').select('*')
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.order('id').limit(USER_INDEX_PAGE_SIZE).execute().data or []
+            for row in rows:
+                self.put(row)
+            count += len(rows)
+            if len(rows) < USER_INDEX_PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+        self.loaded = True
+        print(f"✓ User identity index loaded with {count} users")
+        return count
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'users': len(self._by_key['id']),
+                'loaded': self.loaded,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+user_identity_index = UserIdentityIndex(USER_INDEX_TTL_SECONDS)
+
+def find_user(key, value, fresh=False):
+    """
+    Look a user up by an identity key: the in-memory index first, then the users table.
+
+    fresh=True always reads the table (and re-indexes or forgets the row); paths that issue a
+    token or return the profile use it so they never act on a stale or deleted user.
+    """
+    if not fresh:
+        user = user_identity_index.get(key, value)
+        if user is not None or not supabase:
+            return user
+    elif not supabase:
+        return None
+    result = supabase.table('users').select('*').eq(key, value).execute()
+    if not result.data:
+        user_identity_index.discard(key, value)
+        return None
+    user_identity_index.put(result.data[0])
+    return dict(result.data[0])
+
+def preload_user_identity_index():
+    try:
+        user_identity_index.preload()
+    except Exception as e:
+        print(f"⚠️ Could not preload user identity index: {e}")
+
 def sync_firebase_user_to_database(firebase_result):
     """Sync Firebase user to Supabase users table and ensure authenticated role"""
     if not supabase:
@@ -1211,12 +3929,11 @@ def sync_firebase_user_to_database(firebase_result):
         mobile_number = normalize_phone_number(phone_number)
         
         # Check if user already exists
-        existing_user = supabase.table('users').select('*').eq('firebase_uid', firebase_uid).execute()
+        user = find_user('firebase_uid', firebase_uid, fresh=True)
         
-        if existing_user.data and len(existing_user.data) > 0:
+        if user:
             # User exists, return existing user data
-            user = existing_user.data[0]
-            print(f"✓ Firebase user {firebase_uid} found in database: {user['id']}")
+            print(f"✓ Firebase user {firebase_uid} found: {user['id']}")
             return user
         else:
             # User doesn't exist, create new user
@@ -1233,6 +3950,7 @@ def sync_firebase_user_to_database(firebase_result):
             
             if new_user.data and len(new_user.data) > 0:
                 user = new_user.data[0]
+                user_identity_index.put(user)
                 print(f"✓ New Firebase user created in database: {user['id']} (UID: {firebase_uid})")
                 return user
             else:
@@ -1263,20 +3981,40 @@ def create_supabase_client_with_firebase_jwt(firebase_token):
         print(f"Error creating Firebase-authenticated Supabase client: {e}")
         return None
 
+# Verified-token cache: token hash -> resolved auth info (or INVALID_TOKEN for rejected tokens)
+AUTH_CACHE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_TTL_SECONDS', '300'))
+AUTH_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_NEGATIVE_TTL_SECONDS', '30'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000'))
+auth_token_cache = TTLCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl_seconds=AUTH_CACHE_TTL_SECONDS)
+INVALID_TOKEN = False
+
+def auth_cache_ttl(exp):
+    """Cache lifetime for a verified token: the configured TTL, but never past the token's exp"""
+    if exp is None:
+        return AUTH_CACHE_TTL_SECONDS
+    return min(AUTH_CACHE_TTL_SECONDS, float(exp) - time.time())
+
 def verify_auth_token(token):
     """Verify authentication token (supports both JWT and Firebase tokens)"""
     if not token:
         return None
 
+    cache_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    cached = auth_token_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached) if cached is not INVALID_TOKEN else None
+
     # First try JWT token
     jwt_payload = verify_jwt_token(token)
     if jwt_payload:
-        return {
+        auth_data = {
             'type': 'jwt',
-            'user_id': jwt_payload.get('user_id'),
+            'user_id': normalize_user_id(jwt_payload.get('user_id')),
             'mobile_number': jwt_payload.get('mobile_number'),
             'firebase_uid': jwt_payload.get('firebase_uid')
         }
+        auth_token_cache.set(cache_key, auth_data, ttl_seconds=auth_cache_ttl(jwt_payload.get('exp')))
+        return dict(auth_data)
 
     # If JWT fails, try Firebase token
     if FIREBASE_AVAILABLE:
@@ -1286,17 +4024,25 @@ def verify_auth_token(token):
             user = sync_firebase_user_to_database(firebase_result)
             
             if user:
-                return {
+                auth_data = {
                     'type': 'firebase',
-                    'user_id': user['id'],
+                    'user_id': normalize_user_id(user['id']),
                     'mobile_number': user['mobile_number'],
                     'firebase_uid': user['firebase_uid'],
                     'firebase_token': token,  # Include original token for authenticated requests
                     'civic_id': user.get('civic_id')
                 }
+                auth_token_cache.set(cache_key, auth_data, ttl_seconds=auth_cache_ttl(firebase_result.get('exp')))
+                return dict(auth_data)
             else:
+                # Database trouble is transient, so this is not remembered as an invalid token
                 print(f"Could not sync Firebase user to database")
+                return None
+        if not firebase_result.get('invalid'):
+            return None
 
+    # Rejected by every verifier: remember briefly so repeats skip the crypto
+    auth_token_cache.set(cache_key, INVALID_TOKEN, ttl_seconds=AUTH_CACHE_NEGATIVE_TTL_SECONDS)
     return None
 
 def send_otp_sms(mobile_number, otp):
@@ -1304,6 +4050,129 @@ def send_otp_sms(mobile_number, otp):
     print(f"📱 SMS OTP: {otp} sent to +91{mobile_number}")
     return True
 
+def send_otp_sms_batch(messages):
+    """
+    Send [(mobile_number, otp), ...] and return one success flag per message.
+    Point this at the gateway's bulk endpoint when it has one; the mock sends one at a time.
+    """
+    return [send_otp_sms(mobile_number, otp) for mobile_number, otp in messages]
+
+# Background OTP delivery so /auth/send-otp never waits on the SMS gateway
+OTP_DELIVERY_WORKERS = int(os.getenv('OTP_DELIVERY_WORKERS', '2'))
+OTP_DELIVERY_BATCH_SIZE = int(os.getenv('OTP_DELIVERY_BATCH_SIZE', '20'))
+OTP_DELIVERY_MAX_RETRIES = int(os.getenv('OTP_DELIVERY_MAX_RETRIES', '4'))
+OTP_DELIVERY_BACKOFF_SECONDS = float(os.getenv('OTP_DELIVERY_BACKOFF_SECONDS', '1'))
+
+class OTPDeliveryQueue:
+    """
+    Pending SMS deliveries keyed by mobile number, drained by a small worker pool.
+
+    A number has at most one queued message: a newer OTP replaces a queued one, and a failed
+    send is only retried (with exponential backoff and jitter) while no newer code exists and
+    the code is still valid. Workers take up to batch_size due messages per gateway call.
+    """
+
+    def __init__(self, workers, batch_size, max_retries, backoff_seconds):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._pending = {}   # mobile -> {'otp', 'attempt', 'due', 'expires_at'}
+        self._due = []       # heap of (due, mobile); stale items are skipped when popped
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stats = {'queued': 0, 'coalesced': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'expired': 0, 'batches': 0}
+
+    def enqueue(self, mobile_number, otp, ttl_seconds):
+        now = time.monotonic()
+        with self._cond:
+            if mobile_number in self._pending:
+                self._stats['coalesced'] += 1
+            self._stats['queued'] += 1
+            self._schedule(mobile_number, otp, 0, now, now + ttl_seconds)
+            self._cond.notify()
+
+    def _schedule(self, mobile_number, otp, attempt, due, expires_at):
+        self._pending[mobile_number] = {'otp': otp, 'attempt': attempt, 'due': due, 'expires_at': expires_at}
+        heapq.heappush(self._due, (due, mobile_number))
+
+    def _take_batch(self):
+        """Block until something is due, then pop up to batch_size due messages"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._due:
+                    due, mobile_number = self._due[0]
+                    entry = self._pending.get(mobile_number)
+                    if entry is None or entry['due'] != due:
+                        heapq.heappop(self._due)   # superseded
+                        continue
+                    break
+                if self._due and self._due[0][0] <= now:
+                    break
+                self._cond.wait(self._due[0][0] - now if self._due else None)
+
+            batch = []
+            while self._due and self._due[0][0] <= now and len(batch) < self.batch_size:
+                due, mobile_number = heapq.heappop(self._due)
+                entry = self._pending.get(mobile_number)
+                if entry is None or entry['due'] != due:
+                    continue
+                del self._pending[mobile_number]
+                if entry['expires_at'] <= now:
+                    self._stats['expired'] += 1
+                    continue
+                batch.append((mobile_number, entry))
+            return batch
+
+    def _deliver(self, batch):
+        try:
+            results = send_otp_sms_batch([(mobile_number, entry['otp']) for mobile_number, entry in batch])
+        except Exception as e:
+            print(f"❌ OTP delivery batch failed: {e}")
+            results = [False] * len(batch)
+
+        now = time.monotonic()
+        with self._cond:
+            self._stats['batches'] += 1
+            for (mobile_number, entry), delivered in zip(batch, results):
+                if delivered:
+                    self._stats['sent'] += 1
+                    continue
+                attempt = entry['attempt'] + 1
+                delay = self.backoff_seconds * (2 ** entry['attempt']) * random.uniform(0.5, 1.5)
+                if mobile_number in self._pending or attempt > self.max_retries or now + delay >= entry['expires_at']:
+                    self._stats['failed'] += 1
+                    print(f"❌ Giving up on OTP delivery to {mobile_number} after {attempt} attempt(s)")
+                    if mobile_number not in self._pending:
+                        # Let the number request a new code right away
+                        for auth_type in ('login', 'register'):
+                            otp_store.discard(f"{mobile_number}_{auth_type}", entry['otp'])
+                    continue
+                self._stats['retried'] += 1
+                self._schedule(mobile_number, entry['otp'], attempt, now + delay, entry['expires_at'])
+            self._cond.notify()
+
+    def start(self):
+        def loop():
+            while True:
+                batch = self._take_batch()
+                if batch:
+                    self._deliver(batch)
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=loop, name=f'otp-delivery-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stats(self):
+        with self._cond:
+            return {'workers': self.workers, 'batch_size': self.batch_size, 'pending': len(self._pending), **self._stats}
+
+otp_delivery = OTPDeliveryQueue(OTP_DELIVERY_WORKERS, OTP_DELIVERY_BATCH_SIZE, OTP_DELIVERY_MAX_RETRIES, OTP_DELIVERY_BACKOFF_SECONDS)
+if OTP_DELIVERY_WORKERS > 0:
+    otp_delivery.start()
+
 # Authentication endpoints
 @app.route('/auth/send-otp', methods=['POST'])
 def send_otp():
@@ -1325,32 +4194,38 @@ def send_otp():
         # For login, check if user exists
         if auth_type == 'login':
             if supabase:
-                result = supabase.table('users').select('*').eq('mobile_number', mobile_number).execute()
-                if not result.data:
+                if not find_user('mobile_number', mobile_number):
                     return jsonify({'error': 'Mobile number not registered. Please register first.'}), 404
         
         # For register, check if user already exists
         if auth_type == 'register':
             if supabase:
-                result = supabase.table('users').select('*').eq('mobile_number', mobile_number).execute()
-                if result.data:
+                if find_user('mobile_number', mobile_number):
                     return jsonify({'error': 'Mobile number already registered. Please login instead.'}), 400
         
-        # Generate OTP
+        # Store OTP with expiration (OTP_TTL_SECONDS, 5 minutes by default). One SMS per number
+        # and flow while its code is valid: a repeat request keeps the code already sent
         otp = generate_otp()
-        
-        # Store OTP with expiration (5 minutes)
         otp_key = f"{mobile_number}_{auth_type}"
-        otp_store[otp_key] = {
-            'otp': otp,
-            'expires_at': datetime.now() + timedelta(minutes=5),
+        retry_after = otp_store.put_if_absent(otp_key, otp, {
             'mobile_number': mobile_number,
             'auth_type': auth_type,
             'user_data': user_data
-        }
+        }, OTP_TTL_SECONDS)
+        if retry_after is not None:
+            print(f"ℹ️ OTP for {mobile_number} ({auth_type}) is still valid, not sending another")
+            return jsonify({
+                'message': 'OTP already sent',
+                'mobile_number': mobile_number,
+                'already_sent': True,
+                'retry_after_seconds': retry_after
+            })
         
-        # Send OTP (mock implementation)
-        send_otp_sms(mobile_number, otp)
+        # Hand the SMS to the delivery workers; the OTP is already persisted above
+        if OTP_DELIVERY_WORKERS > 0:
+            otp_delivery.enqueue(mobile_number, otp, OTP_TTL_SECONDS)
+        elif not send_otp_sms(mobile_number, otp):
+            otp_store.discard(otp_key, otp)
         
         return jsonify({
             'message': 'OTP sent successfully',
@@ -1376,22 +4251,21 @@ def verify_otp():
         if not all([mobile_number, otp, auth_type]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Check OTP
+        # Check OTP (a correct code is consumed, a wrong one counts towards OTP_MAX_ATTEMPTS)
         otp_key = f"{mobile_number}_{auth_type}"
-        stored_otp = otp_store.get(otp_key)
+        outcome, _ = otp_store.check(otp_key, otp)
         
-        if not stored_otp:
+        if outcome == OTPStore.MISSING:
             return jsonify({'error': 'OTP not found or expired'}), 400
         
-        if stored_otp['expires_at'] < datetime.now():
-            del otp_store[otp_key]
+        if outcome == OTPStore.EXPIRED:
             return jsonify({'error': 'OTP expired'}), 400
         
-        if stored_otp['otp'] != otp:
-            return jsonify({'error': 'Invalid OTP'}), 400
+        if outcome == OTPStore.LOCKED:
+            return jsonify({'error': 'Too many invalid attempts. Please request a new OTP.'}), 429
         
-        # OTP is valid, remove from store
-        del otp_store[otp_key]
+        if outcome == OTPStore.INVALID:
+            return jsonify({'error': 'Invalid OTP'}), 400
         
         if supabase:
             if auth_type == 'register':
@@ -1404,11 +4278,11 @@ def verify_otp():
                 
                 result = supabase.table('users').insert(user_insert).execute()
                 user = result.data[0] if result.data else user_insert
+                user_identity_index.put(user)
                 
             else:  # login
                 # Get existing user
-                result = supabase.table('users').select('*').eq('mobile_number', mobile_number).execute()
-                user = result.data[0] if result.data else None
+                user = find_user('mobile_number', mobile_number, fresh=True)
                 
                 if not user:
                     return jsonify({'error': 'User not found'}), 404
@@ -1473,9 +4347,8 @@ def firebase_auth():
         user = None
         if supabase:
             try:
-                response = supabase.table('users').select('*').eq('mobile_number', normalized_phone).execute()
-                if response.data and len(response.data) > 0:
-                    user = response.data[0]
+                user = find_user('mobile_number', normalized_phone, fresh=True)
+                if user:
                     print(f"Found existing user: {normalized_phone}")
             except Exception as e:
                 print(f"Error checking user in Supabase: {e}")
@@ -1496,6 +4369,7 @@ def firebase_auth():
                     response = supabase.table('users').insert(user_data).execute()
                     if response.data and len(response.data) > 0:
                         user = response.data[0]
+                        user_identity_index.put(user)
                     print(f"✓ Created new Firebase user: {normalized_phone}")
                 except Exception as e:
                     print(f"Error creating user in Supabase: {e}")
@@ -1510,7 +4384,8 @@ def firebase_auth():
                             'is_verified': True,
                             'auth_provider': 'firebase'
                         }).eq('id', user['id']).execute()
-                        user['firebase_uid'] = firebase_uid
+                        user.update({'firebase_uid': firebase_uid, 'is_verified': True, 'auth_provider': 'firebase'})
+                        user_identity_index.put(user)
                         print(f"✓ Updated existing user with Firebase UID: {normalized_phone}")
                     except Exception as e:
                         print(f"Error updating user in Supabase: {e}")
@@ -1617,18 +4492,11 @@ def update_profile():
 
         if supabase:
             # Find user by civic_id
-            user_query = supabase.table('users').select('*').eq('civic_id', civic_id).execute()
-            if not user_query.data:
+            existing_user = find_user('civic_id', civic_id)
+            if not existing_user:
                 return jsonify({'error': 'User not found'}), 404
 
-            user_id = user_query.data[0]['id']
-
-            # Check if civic_id already exists for another user (if user is trying to change it)
-            if civic_id != user_query.data[0]['civic_id']:
-                existing = supabase.table('users').select('id').eq('civic_id', civic_id).neq('id', user_id).execute()
-                if existing.data:
-                    # Generate a new civic_id if conflict
-                    civic_id = generate_civic_id()
+            user_id = existing_user['id']
 
             # Update user profile
             update_data = {
@@ -1644,6 +4512,7 @@ def update_profile():
 
             if not user:
                 return jsonify({'error': 'Failed to update user'}), 500
+            user_identity_index.put(user)
         else:
             # Fallback for development
             user = {
@@ -1692,9 +4561,8 @@ def register_user():
         user = None
         if supabase:
             try:
-                response = supabase.table('users').select('*').eq('mobile_number', normalized_phone).execute()
-                if response.data and len(response.data) > 0:
-                    user = response.data[0]
+                user = find_user('mobile_number', normalized_phone, fresh=True)
+                if user:
                     print(f"Found existing user: {normalized_phone}")
                     return jsonify({
                         'success': True,
@@ -1717,6 +4585,7 @@ def register_user():
                 response = supabase.table('users').insert(user_data).execute()
                 if response.data and len(response.data) > 0:
                     user = response.data[0]
+                    user_identity_index.put(user)
                 print(f"✓ Created new user: {normalized_phone} with Civic ID: {user_data['civic_id']}")
             except Exception as e:
                 print(f"Error creating user in Supabase: {e}")
@@ -1745,6 +4614,17 @@ def register_user():
         print(f"Error in user registration: {e}")
         return jsonify({'success': False, 'message': 'Registration failed'}), 500
 
+start_vouch_reconciler()
+if supabase and MEDIA_PIPELINE_ENABLED:
+    media_pipeline.recover()
+if supabase and VOUCH_BUFFER_ENABLED:
+    vouch_buffer.start()
+if supabase:
+    # Build and refresh the leaderboard index in the background so neither startup nor /top blocks on it
+    start_vouch_ranking_refresher()
+    if USER_INDEX_PRELOAD:
+        threading.Thread(target=preload_user_identity_index, name='user-index-loader', daemon=True).start()
+
 if __name__ == '__main__':
     from datetime import datetime
     import socket
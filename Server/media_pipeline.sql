@@ -0,0 +1,69 @@
+-- Background media uploads
+-- Run this in your Supabase SQL Editor after vouch_counts_materialized.sql,
+-- then set MEDIA_PIPELINE_ENABLED=true on the server
+--
+-- Issues are inserted before their image/audio finish uploading. media_status tells
+-- clients where the upload stands: none, pending, ready or failed.
+
+-- 1. Upload status column (existing rows have nothing in flight)
+ALTER TABLE issues ADD COLUMN IF NOT EXISTS media_status TEXT NOT NULL DEFAULT 'none';
+
+ALTER TABLE issues DROP CONSTRAINT IF EXISTS issues_media_status_check;
+ALTER TABLE issues ADD CONSTRAINT issues_media_status_check
+    CHECK (media_status IN ('none', 'pending', 'ready', 'failed'));
+
+UPDATE issues
+SET media_status = 'ready'
+WHERE media_status = 'none'
+  AND (image_url IS NOT NULL OR audio_url IS NOT NULL);
+
+-- Small partial index for finding uploads that never completed
+CREATE INDEX IF NOT EXISTS idx_issues_media_pending ON issues(created_at) WHERE media_status = 'pending';
+
+-- 2. Expose media_status through issue_vouch_counts (new column appended at the end)
+CREATE OR REPLACE VIEW issue_vouch_counts AS
+SELECT
+    i.id,
+    i.user_id,
+    i.title,
+    i.description,
+    i.status,
+    i.category,
+    i.priority,
+    i.latitude,
+    i.longitude,
+    i.description_mode,
+    i.image_filename,
+    i.audio_filename,
+    i.image_url,
+    i.audio_url,
+    i.vouch_priority,
+    i.created_at,
+    i.updated_at,
+    i.vouch_count,
+    (
+        SELECT ARRAY_AGG(
+            JSON_BUILD_OBJECT(
+                'user_id', u.id,
+                'mobile_number', u.mobile_number,
+                'civic_id', u.civic_id,
+                'full_name', u.full_name,
+                'vouched_at', v.created_at
+            )
+        )
+        FROM vouches v
+        JOIN users u ON u.id = v.user_id
+        WHERE v.issue_id = i.id
+    ) AS vouchers,
+    i.media_status
+FROM issues i;
+
+GRANT SELECT ON issue_vouch_counts TO authenticated, anon;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Media pipeline column installed successfully!';
+    RAISE NOTICE '- issues.media_status: none | pending | ready | failed';
+    RAISE NOTICE '- issue_vouch_counts now includes media_status';
+END $$;
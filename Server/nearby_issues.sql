@@ -0,0 +1,96 @@
+-- Distance-ordered nearby search for GET /api/issues/nearby?lat=&lng=
+-- Run this in your Supabase SQL Editor after vouch_counts_materialized.sql (re-run it to upgrade)
+--
+-- nearby_issues() filters the bounding box through idx_issues_location, computes the
+-- haversine distance, orders by (distance_m, id) and applies the keyset cursor and limit
+-- in the database, so only one page crosses the wire regardless of how dense the area is.
+-- Without it the server pages through the whole box and sorts in Python.
+
+-- Earlier version without the fields parameter
+DROP FUNCTION IF EXISTS nearby_issues(DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, BIGINT, BIGINT, INTEGER);
+
+-- 1. One page of issues, nearest first, each with distance_m (meters, 0.1 m)
+-- Returns a JSON array; after_distance/after_id come from the previous page's cursor.
+-- fields limits the columns returned (NULL = all of issue_vouch_counts); the vouchers
+-- list is only aggregated when fields is NULL or contains 'vouchers'.
+CREATE OR REPLACE FUNCTION nearby_issues(
+    center_lat DOUBLE PRECISION,
+    center_lng DOUBLE PRECISION,
+    radius_m DOUBLE PRECISION,
+    min_lat DOUBLE PRECISION,
+    min_lng DOUBLE PRECISION,
+    max_lat DOUBLE PRECISION,
+    max_lng DOUBLE PRECISION,
+    after_distance DOUBLE PRECISION DEFAULT NULL,
+    after_id BIGINT DEFAULT NULL,
+    exclude_user_id BIGINT DEFAULT NULL,
+    page_limit INTEGER DEFAULT 50,
+    fields TEXT[] DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+  WITH candidates AS (
+    SELECT i.id,
+           ROUND((2 * 6371008.8 * ASIN(LEAST(1.0, SQRT(
+               POWER(SIN(RADIANS(i.latitude - center_lat) / 2), 2) +
+               COS(RADIANS(center_lat)) * COS(RADIANS(i.latitude)) *
+               POWER(SIN(RADIANS(i.longitude - center_lng) / 2), 2)
+           ))))::NUMERIC, 1)::DOUBLE PRECISION AS distance_m
+    FROM issues i
+    WHERE i.latitude BETWEEN min_lat AND max_lat
+      AND i.longitude BETWEEN min_lng AND max_lng
+      AND (exclude_user_id IS NULL OR i.user_id IS DISTINCT FROM exclude_user_id)
+  ),
+  page AS (
+    SELECT id, distance_m
+    FROM candidates
+    WHERE (radius_m IS NULL OR distance_m <= radius_m)
+      AND (after_id IS NULL OR (distance_m, id) > (after_distance, after_id))
+    ORDER BY distance_m, id
+    LIMIT page_limit
+  )
+  -- Columns come from the issues row itself (the view's columns minus vouchers), so the
+  -- correlated vouchers subquery only runs in the CASE branch that asks for it
+  SELECT COALESCE(json_agg(
+           (
+             CASE WHEN fields IS NULL THEN to_jsonb(i)
+                  ELSE COALESCE((SELECT jsonb_object_agg(c.key, c.value)
+                                 FROM jsonb_each(to_jsonb(i)) c
+                                 WHERE c.key = ANY(fields)), '{}'::jsonb)
+             END
+             || jsonb_build_object('distance_m', p.distance_m)
+             || CASE WHEN fields IS NULL OR 'vouchers' = ANY(fields) THEN
+                  jsonb_build_object('vouchers', (
+                    SELECT ARRAY_AGG(
+                        JSON_BUILD_OBJECT(
+                            'user_id', u.id,
+                            'mobile_number', u.mobile_number,
+                            'civic_id', u.civic_id,
+                            'full_name', u.full_name,
+                            'vouched_at', vo.created_at
+                        )
+                    )
+                    FROM vouches vo
+                    JOIN users u ON u.id = vo.user_id
+                    WHERE vo.issue_id = i.id
+                  ))
+                ELSE '{}'::jsonb
+                END
+           )
+           ORDER BY p.distance_m, p.id
+         ), '[]'::json)
+  FROM page p
+  JOIN issues i ON i.id = p.id;
+$$;
+
+GRANT EXECUTE ON FUNCTION nearby_issues(DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, BIGINT, BIGINT, INTEGER, TEXT[]) TO authenticated, anon;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Nearby search function installed successfully!';
+    RAISE NOTICE '- nearby_issues(...) returns one distance-ordered page of issues';
+END $$;
@@ -0,0 +1,107 @@
+-- Batched vouch ingestion
+-- Run this in your Supabase SQL Editor after vouch_counts_materialized.sql
+--
+-- vouch_issues_batch() inserts a whole buffer of (user_id, issue_id) pairs in one
+-- statement and applies one counter update per issue, instead of one RPC and one
+-- trigger-driven UPDATE per vouch.
+
+-- 1. Let the row trigger stand aside while a batch applies its own aggregated deltas
+CREATE OR REPLACE FUNCTION maintain_issue_vouch_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.bulk_vouch', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        UPDATE issues
+        SET vouch_count = vouch_count + 1,
+            vouch_priority = vouch_priority + 1
+        WHERE id = NEW.issue_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE issues
+        SET vouch_count = GREATEST(vouch_count - 1, 0),
+            vouch_priority = GREATEST(vouch_priority - 1, 0)
+        WHERE id = OLD.issue_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- delta_sync.sql's updated_at trigger likewise; the batch sets updated_at itself
+CREATE OR REPLACE FUNCTION touch_issue_on_vouch_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.bulk_vouch', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE issues
+    SET updated_at = NOW()
+    WHERE id = COALESCE(NEW.issue_id, OLD.issue_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 2. Bulk insert + per-issue count delta, all in the caller's transaction
+-- vouches_param: [{"user_id": 1, "issue_id": 42}, ...]
+-- Returns [{"issue_id": 42, "vouch_count": 17, "user_ids": [1, ...]}, ...] for issues that changed
+CREATE OR REPLACE FUNCTION vouch_issues_batch(vouches_param JSONB)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  result JSON;
+BEGIN
+  PERFORM set_config('app.bulk_vouch', 'on', true);
+
+  WITH requested AS (
+    SELECT DISTINCT (v->>'user_id')::BIGINT AS user_id, (v->>'issue_id')::BIGINT AS issue_id
+    FROM jsonb_array_elements(vouches_param) v
+  ),
+  inserted AS (
+    INSERT INTO vouches (user_id, issue_id, created_at)
+    SELECT r.user_id, r.issue_id, NOW()
+    FROM requested r
+    JOIN issues i ON i.id = r.issue_id
+    JOIN users u ON u.id = r.user_id
+    ON CONFLICT (user_id, issue_id) DO NOTHING
+    RETURNING user_id, issue_id
+  ),
+  deltas AS (
+    SELECT issue_id, COUNT(*)::INTEGER AS delta, ARRAY_AGG(user_id) AS user_ids
+    FROM inserted
+    GROUP BY issue_id
+  ),
+  updated AS (
+    UPDATE issues i
+    SET vouch_count = i.vouch_count + d.delta,
+        vouch_priority = i.vouch_priority + d.delta,
+        updated_at = NOW()
+    FROM deltas d
+    WHERE i.id = d.issue_id
+    RETURNING i.id, i.vouch_count, d.user_ids
+  )
+  SELECT COALESCE(json_agg(json_build_object(
+    'issue_id', id,
+    'vouch_count', vouch_count,
+    'user_ids', user_ids
+  )), '[]'::json)
+  INTO result
+  FROM updated;
+
+  PERFORM set_config('app.bulk_vouch', 'off', true);
+  RETURN result;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION vouch_issues_batch(JSONB) TO authenticated, anon;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Batched vouch ingestion installed successfully!';
+    RAISE NOTICE '- vouch_issues_batch(jsonb) inserts vouches and applies per-issue count deltas';
+    RAISE NOTICE '- Set VOUCH_BUFFER_ENABLED=true on the server to use it';
+END $$;
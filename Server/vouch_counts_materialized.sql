@@ -0,0 +1,240 @@
+-- Incrementally maintained vouch counts
+-- Run this in your Supabase SQL Editor after vouch_fix_quick.sql
+--
+-- issues.vouch_count is kept up to date by a trigger on vouches, so feeds no longer
+-- COUNT + ARRAY_AGG over issues ⋈ vouches ⋈ users for the whole table on every request.
+
+-- 1. Counter column, backfilled from the vouches table. vouch_priority is left alone: it
+--    starts at 1 for new issues and also carries anonymous vouches, so it is not a count.
+ALTER TABLE issues ADD COLUMN IF NOT EXISTS vouch_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE issues i
+SET vouch_count = c.cnt
+FROM (
+    SELECT i2.id, COUNT(v.id)::INTEGER AS cnt
+    FROM issues i2
+    LEFT JOIN vouches v ON v.issue_id = i2.id
+    GROUP BY i2.id
+) c
+WHERE c.id = i.id
+  AND i.vouch_count IS DISTINCT FROM c.cnt;
+
+-- Leaderboard / vouch-details ordering
+CREATE INDEX IF NOT EXISTS idx_issues_vouch_count ON issues(vouch_count DESC, id DESC);
+
+-- 2. Keep the counter in step with every insert/delete on vouches (row-level, atomic)
+CREATE OR REPLACE FUNCTION maintain_issue_vouch_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE issues
+        SET vouch_count = vouch_count + 1,
+            vouch_priority = vouch_priority + 1
+        WHERE id = NEW.issue_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE issues
+        SET vouch_count = GREATEST(vouch_count - 1, 0),
+            vouch_priority = GREATEST(vouch_priority - 1, 0)
+        WHERE id = OLD.issue_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS maintain_issue_vouch_count ON vouches;
+CREATE TRIGGER maintain_issue_vouch_count
+    AFTER INSERT OR DELETE ON vouches
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_issue_vouch_count();
+
+-- 3. vouch_issue / check_user_vouch read the counter instead of COUNT(*)
+CREATE OR REPLACE FUNCTION vouch_issue(issue_id_param BIGINT, user_id_param BIGINT DEFAULT NULL)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  issue_exists BOOLEAN := false;
+  new_vouch_count INTEGER;
+  new_vouch_priority INTEGER;
+  jwt_firebase_uid TEXT;
+  actual_user_id BIGINT;
+  inserted_id BIGINT;
+BEGIN
+  SELECT EXISTS(SELECT 1 FROM issues WHERE id = issue_id_param) INTO issue_exists;
+
+  IF NOT issue_exists THEN
+    RETURN json_build_object('success', false, 'error', 'Issue not found');
+  END IF;
+
+  -- If user_id is not provided, try to extract from JWT (for Firebase auth)
+  IF user_id_param IS NULL THEN
+    jwt_firebase_uid := auth.jwt() ->> 'sub';
+
+    IF jwt_firebase_uid IS NOT NULL THEN
+      SELECT id INTO actual_user_id
+      FROM users
+      WHERE firebase_uid = jwt_firebase_uid
+      LIMIT 1;
+    END IF;
+  ELSE
+    actual_user_id := user_id_param;
+  END IF;
+
+  IF actual_user_id IS NOT NULL THEN
+    -- The unique constraint decides duplicates; the trigger bumps issues.vouch_count
+    INSERT INTO vouches (user_id, issue_id, created_at)
+    VALUES (actual_user_id, issue_id_param, NOW())
+    ON CONFLICT (user_id, issue_id) DO NOTHING
+    RETURNING id INTO inserted_id;
+
+    IF inserted_id IS NULL THEN
+      RETURN json_build_object(
+        'success', false,
+        'error', 'User has already vouched for this issue',
+        'already_vouched', true
+      );
+    END IF;
+  END IF;
+
+  SELECT vouch_count, vouch_priority INTO new_vouch_count, new_vouch_priority
+  FROM issues WHERE id = issue_id_param;
+
+  RETURN json_build_object(
+    'success', true,
+    'issue_id', issue_id_param,
+    'vouch_count', new_vouch_count,
+    'vouch_priority', new_vouch_priority,
+    'user_vouched', actual_user_id IS NOT NULL,
+    'user_id', actual_user_id
+  );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION check_user_vouch(issue_id_param BIGINT, user_id_param BIGINT DEFAULT NULL)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  jwt_firebase_uid TEXT;
+  actual_user_id BIGINT;
+  has_vouched BOOLEAN := false;
+  current_count INTEGER;
+  current_priority INTEGER;
+BEGIN
+  IF user_id_param IS NULL THEN
+    jwt_firebase_uid := auth.jwt() ->> 'sub';
+
+    IF jwt_firebase_uid IS NOT NULL THEN
+      SELECT id INTO actual_user_id
+      FROM users
+      WHERE firebase_uid = jwt_firebase_uid
+      LIMIT 1;
+    END IF;
+  ELSE
+    actual_user_id := user_id_param;
+  END IF;
+
+  IF actual_user_id IS NOT NULL THEN
+    SELECT EXISTS(
+      SELECT 1 FROM vouches
+      WHERE user_id = actual_user_id AND issue_id = issue_id_param
+    ) INTO has_vouched;
+  END IF;
+
+  SELECT vouch_count, vouch_priority INTO current_count, current_priority
+  FROM issues WHERE id = issue_id_param;
+
+  RETURN json_build_object(
+    'issue_id', issue_id_param,
+    'user_id', actual_user_id,
+    'user_vouched', has_vouched,
+    'vouch_count', COALESCE(current_count, 0),
+    'vouch_priority', COALESCE(current_priority, 0)
+  );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION vouch_issue(BIGINT, BIGINT) TO authenticated, anon;
+GRANT EXECUTE ON FUNCTION check_user_vouch(BIGINT, BIGINT) TO authenticated, anon;
+
+-- 4. issue_vouch_counts becomes a plain projection of issues: no GROUP BY, so filters,
+--    ordering and LIMIT go straight to the issues indexes. The voucher list is a
+--    correlated subquery that Postgres only evaluates when `vouchers` is selected.
+DROP VIEW IF EXISTS issue_vouch_counts;
+
+CREATE VIEW issue_vouch_counts AS
+SELECT
+    i.id,
+    i.user_id,
+    i.title,
+    i.description,
+    i.status,
+    i.category,
+    i.priority,
+    i.latitude,
+    i.longitude,
+    i.description_mode,
+    i.image_filename,
+    i.audio_filename,
+    i.image_url,
+    i.audio_url,
+    i.vouch_priority,
+    i.created_at,
+    i.updated_at,
+    i.vouch_count,
+    (
+        SELECT ARRAY_AGG(
+            JSON_BUILD_OBJECT(
+                'user_id', u.id,
+                'mobile_number', u.mobile_number,
+                'civic_id', u.civic_id,
+                'full_name', u.full_name,
+                'vouched_at', v.created_at
+            )
+        )
+        FROM vouches v
+        JOIN users u ON u.id = v.user_id
+        WHERE v.issue_id = i.id
+    ) AS vouchers
+FROM issues i;
+
+GRANT SELECT ON issue_vouch_counts TO authenticated, anon;
+
+-- 5. Reconciliation: repair vouch_count where it drifted from the vouches table.
+--    vouch_priority is not touched. Returns the number of issues fixed.
+CREATE OR REPLACE FUNCTION reconcile_vouch_counts()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  repaired INTEGER;
+BEGIN
+  UPDATE issues i
+  SET vouch_count = c.cnt
+  FROM (
+      SELECT i2.id, COUNT(v.id)::INTEGER AS cnt
+      FROM issues i2
+      LEFT JOIN vouches v ON v.issue_id = i2.id
+      GROUP BY i2.id
+  ) c
+  WHERE c.id = i.id
+    AND i.vouch_count IS DISTINCT FROM c.cnt;
+
+  GET DIAGNOSTICS repaired = ROW_COUNT;
+  RETURN repaired;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION reconcile_vouch_counts() TO authenticated, anon;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE 'Materialized vouch counts installed successfully!';
+    RAISE NOTICE '- issues.vouch_count maintained by trigger on vouches';
+    RAISE NOTICE '- issue_vouch_counts view reads the counter (no per-request aggregation)';
+    RAISE NOTICE '- SELECT reconcile_vouch_counts(); repairs drift';
+END $$;
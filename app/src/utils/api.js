@@ -144,6 +144,49 @@ export const issueAPI = {
       throw error;
     }
   },
+
+  // Get vouch counts and user vouch status for many issues in one request
+  getVouchStatuses: async (issueIds) => {
+    try {
+      const response = await fetch(`${API_ENDPOINTS.ISSUES}/vouch-status`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          ...getAuthHeaders(),
+        },
+        body: JSON.stringify({ issue_ids: issueIds }),
+      });
+      
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      
+      return await response.json();
+    } catch (error) {
+      console.error('Error getting vouch statuses:', error);
+      throw error;
+    }
+  },
+
+  // Subscribe to live issue events; handlers keyed by event type
+  // (issue_created, vouch_count_changed, status_changed, media_ready, resync). Returns an unsubscribe function.
+  subscribeToEvents: (handlers) => {
+    const source = new EventSource(`${API_BASE_URL}/api/stream`);
+    ['issue_created', 'vouch_count_changed', 'status_changed', 'media_ready'].forEach((type) => {
+      source.addEventListener(type, (event) => {
+        if (handlers[type]) {
+          handlers[type](JSON.parse(event.data));
+        }
+      });
+    });
+    // The server dropped us for falling behind: refetch the list, then the browser reconnects
+    source.addEventListener('resync', () => {
+      if (handlers.resync) {
+        handlers.resync();
+      }
+    });
+    return () => source.close();
+  },
 };
 
 // Authentication API functions